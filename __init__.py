@@ -1,4 +1,4 @@
 # __init__.py
-from .game_data import stages, characters
+from .game_data import stages, stage_metadata, characters
 
-__all__ = ["stages", "characters"]
+__all__ = ["stages", "stage_metadata", "characters"]
@@ -0,0 +1,222 @@
+import hashlib
+import io
+from datetime import date
+from typing import Callable
+
+import polars as pl
+from flask import Blueprint, Response, jsonify, request
+
+from compute_pool import ComputePool, Overloaded
+from dataset import Dataset, DatasetStore
+from df_utils import (
+    calculate_set_character_winrates,
+    calculate_stage_winrates,
+    calculate_game_character_winrates,
+)
+from storage import filter_games, filter_sets
+
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+elo_series_columns = [
+    "Row Index",
+    "Date",
+    "Time",
+    "My ELO",
+    "Opponent ELO",
+    "ELO Diff",
+    "Main",
+    "Win/Loss",
+]
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _parse_date(name: str) -> date | None:
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' should be a YYYY-MM-DD date, got '{value}'")
+
+
+def _query() -> dict:
+    # the filters every table accepts, None when a filter isn't given
+    return {
+        "player": request.args.get("player"),
+        "character": request.args.get("character"),
+        "start_date": _parse_date("start"),
+        "end_date": _parse_date("end"),
+    }
+
+
+def _wants_arrow() -> bool:
+    output_format = request.args.get("format")
+    if output_format is None:
+        return (
+            request.accept_mimetypes.best_match(["application/json", ARROW_MIMETYPE])
+            == ARROW_MIMETYPE
+        )
+    if output_format not in ("json", "arrow"):
+        raise BadRequest(f"'format' should be json or arrow, got '{output_format}'")
+    return output_format == "arrow"
+
+
+def _etag(signature, arrow: bool) -> str:
+    # the same request against the same stored data always gets the same table. The
+    # storage signature is used rather than the dataset version, which starts over on
+    # a restart and differs between workers
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.args.items()))
+    key = f"{signature}|{request.path}?{query}|{'arrow' if arrow else 'json'}"
+    return hashlib.sha1(key.encode()).hexdigest()[:24]
+
+
+class StorageChanged(RuntimeError):
+    pass
+
+
+# The dashboard's own player's rows come from the loaded dataset rather than storage,
+# filtered in memory the way storage would, so a table always comes from the data its
+# ETag's signature was read with. Anyone else's come from storage.
+class DatasetSource:
+    def __init__(self, dataset: Dataset, player: str):
+        self.dataset = dataset
+        self.player = player
+
+    def signature(self):
+        return self.dataset.signature
+
+    def load_sets(self, player=None, **filters) -> pl.DataFrame:
+        return filter_sets(self.dataset.setwise_df, **filters)
+
+    def load_games(self, player=None, **filters) -> pl.DataFrame:
+        return filter_games(self.dataset.gamewise_df, **filters)
+
+
+def _is_unfiltered(query: dict, source) -> bool:
+    return (
+        isinstance(source, DatasetSource)
+        and query["character"] is None
+        and query["start_date"] is None
+        and query["end_date"] is None
+    )
+
+
+def stage_winrates(dataset: Dataset, source, query: dict, args: dict):
+    if _is_unfiltered(query, source):
+        return dataset.stage_winrate_df
+    # character is the opponent's character in each game, like the stage tab's filter
+    return calculate_stage_winrates(source.load_games(**query))
+
+
+def matchup_winrates(dataset: Dataset, source, query: dict, args: dict):
+    by = args.get("by", "set")
+    if by not in ("set", "game"):
+        raise BadRequest(f"'by' should be set or game, got '{by}'")
+    if _is_unfiltered(query, source):
+        if by == "set":
+            return dataset.character_set_winrate_df
+        return dataset.character_game_winrate_df
+    if by == "set":
+        return calculate_set_character_winrates(source.load_sets(**query))
+    return calculate_game_character_winrates(source.load_games(**query))
+
+
+def elo_series(dataset: Dataset, source, query: dict, args: dict):
+    if _is_unfiltered(query, source):
+        setwise_df = dataset.setwise_df
+    else:
+        setwise_df = source.load_sets(**query)
+    return setwise_df.select(elo_series_columns)
+
+
+# route -> function returning the table for the current dataset and query. They can run
+# on a compute pool thread, outside the request, so they get its arguments as a dict
+tables = {
+    "stage-winrates": stage_winrates,
+    "matchup-winrates": matchup_winrates,
+    "elo-series": elo_series,
+}
+
+
+def _table_at(
+    table: Callable, dataset: Dataset, source, query: dict, args: dict, signature
+):
+    # storage can change while a table is read from it. The signature is read before
+    # and after, and a table that doesn't match its ETag is never sent or cached
+    df = table(dataset, source, query, args)
+    if source.signature() != signature:
+        raise StorageChanged("The data changed while it was read, try again")
+    return df
+
+
+# Read-only routes serving the dashboard's tables as JSON or Arrow IPC streams, e.g.
+# /api/stage-winrates?character=Kragg&start=2025-01-01&format=arrow. ETags come from the
+# storage signature and the query, so a client sending If-None-Match gets a 304 before
+# anything is loaded or computed, until the data changes. Filtered tables are computed
+# on the dashboard's compute pool and cached there under the same signature and query.
+def create_api(dataset_store: DatasetStore, compute_pool: ComputePool) -> Blueprint:
+    api = Blueprint("api", __name__, url_prefix="/api")
+
+    def serve(name: str):
+        dataset = dataset_store.current
+        if dataset is None:
+            return jsonify(error="Data is still loading"), 503
+        try:
+            arrow = _wants_arrow()
+            query = _query()
+            if query["player"] in (None, dataset_store.storage.player):
+                source = DatasetSource(dataset, dataset_store.storage.player)
+            else:
+                source = dataset_store.storage
+            args = request.args.to_dict()
+            signature = source.signature()
+            etag = _etag(signature, arrow)
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                if _is_unfiltered(query, source):
+                    df = tables[name](dataset, source, query, args)
+                else:
+                    df = compute_pool.cached(
+                        (
+                            "api",
+                            name,
+                            signature,
+                            args.get("by"),
+                            tuple(sorted(query.items())),
+                        ),
+                        _table_at,
+                        tables[name],
+                        dataset,
+                        source,
+                        query,
+                        args,
+                        signature,
+                    )
+                if arrow:
+                    buffer = io.BytesIO()
+                    df.write_ipc_stream(buffer)
+                    response = Response(buffer.getvalue(), mimetype=ARROW_MIMETYPE)
+                else:
+                    response = Response(df.write_json(), mimetype="application/json")
+        except BadRequest as e:
+            return jsonify(error=str(e)), 400
+        except KeyError as e:
+            # the storage doesn't have the requested player
+            return jsonify(error=str(e).strip("'\"")), 404
+        except (Overloaded, StorageChanged) as e:
+            response = jsonify(error=str(e))
+            response.status_code = 503
+            response.headers["Retry-After"] = "1"
+            return response
+        response.set_etag(etag)
+        # always revalidate, the ETag makes that cheap
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    for name in tables:
+        api.add_url_rule(f"/{name}", name, lambda name=name: serve(name))
+    return api
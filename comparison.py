@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+import polars as pl
+
+from df_utils import percentage
+
+# what the two sides of a comparison can be, and the comparison_games column each
+# reads. Players are loaded from storage one player at a time instead.
+comparison_modes = {"Months": "Month", "My Char": "My Char", "Players": "Player"}
+# what a comparison is broken down by, and the gamewise_df column each reads
+comparison_dimensions = {
+    "Character": "Char",
+    "Stage": "Stage",
+    "Stage Choice": "Stage_Choice",
+}
+# markers for two-sided p-values under each threshold, checked in order. Every bar is
+# tested on its own, so with many bars expect the odd * by chance.
+significance_levels = [(0.001, "***"), (0.01, "**"), (0.05, "*")]
+
+
+def comparison_games(setwise_df: pl.DataFrame, gamewise_df: pl.DataFrame):
+    # gamewise_df with the character I played and the month of each game, so either
+    # can pick the two sides of a comparison
+    return gamewise_df.join(
+        setwise_df.select(["Row Index", "My Char"]), on="Row Index", how="left"
+    ).with_columns(pl.col("Date").dt.strftime("%Y-%m").alias("Month"))
+
+
+def cohort_choices(games_df: pl.DataFrame, column: str) -> list[str]:
+    # newest month first, otherwise most played first
+    if column == "Month":
+        return games_df["Month"].unique().sort(descending=True).to_list()
+    return (
+        games_df[column]
+        .drop_nulls()
+        .value_counts(sort=True)
+        .get_column(column)
+        .to_list()
+    )
+
+
+def tag_cohorts(games_df: pl.DataFrame, column: str, a: str, b: str) -> pl.DataFrame:
+    # the games on either side, with a Cohort partition key of A or B
+    return games_df.filter(pl.col(column).is_in([a, b])).with_columns(
+        pl.when(pl.col(column) == a)
+        .then(pl.lit("A"))
+        .otherwise(pl.lit("B"))
+        .alias("Cohort")
+    )
+
+
+def tag_players(games_a: pl.DataFrame, games_b: pl.DataFrame) -> pl.DataFrame:
+    return pl.concat(
+        [
+            games_a.with_columns(pl.lit("A").alias("Cohort")),
+            games_b.with_columns(pl.lit("B").alias("Cohort")),
+        ],
+        how="diagonal_relaxed",
+    )
+
+
+def _p_values(z: np.ndarray) -> np.ndarray:
+    # two-sided, from the normal approximation
+    return np.array(
+        [
+            math.erfc(abs(value) / math.sqrt(2)) if np.isfinite(value) else np.nan
+            for value in z
+        ]
+    )
+
+
+# Both sides are aggregated together in one group_by over the union of their games,
+# each count split by the Cohort key, instead of running the winrate chain once per
+# side. Each value's two winrates are compared with a two-proportion z-test.
+def calculate_cohort_comparison(tagged_df: pl.DataFrame, column: str) -> pl.DataFrame:
+    in_a = pl.col("Cohort") == "A"
+    in_b = pl.col("Cohort") == "B"
+    won = pl.col("Win").fill_null(False)
+    rate_a = pl.col("Wins_A") / pl.col("Games_A")
+    rate_b = pl.col("Wins_B") / pl.col("Games_B")
+    pooled = (pl.col("Wins_A") + pl.col("Wins_B")) / (
+        pl.col("Games_A") + pl.col("Games_B")
+    )
+    standard_error = (
+        pooled * (1 - pooled) * (1 / pl.col("Games_A") + 1 / pl.col("Games_B"))
+    ).sqrt()
+    comparison_df = (
+        tagged_df.filter(pl.col(column).is_not_null())
+        .group_by(pl.col(column).alias("Value"))
+        .agg(
+            [
+                (won & in_a).sum().alias("Wins_A"),
+                in_a.sum().alias("Games_A"),
+                (won & in_b).sum().alias("Wins_B"),
+                in_b.sum().alias("Games_B"),
+            ]
+        )
+        .with_columns(
+            [
+                percentage("Wins_A", "Games_A").alias("WinRate_A"),
+                percentage("Wins_B", "Games_B").alias("WinRate_B"),
+                ((rate_a - rate_b) / standard_error).alias("Z"),
+            ]
+        )
+        .with_columns((pl.col("WinRate_A") - pl.col("WinRate_B")).alias("Difference"))
+        .sort("Value")
+    )
+    # a side with no games, or both sides winning all or none, has no z
+    p_values = _p_values(comparison_df["Z"].to_numpy())
+    significance = np.full(len(p_values), "", dtype=object)
+    for threshold, marker in reversed(significance_levels):
+        significance[p_values < threshold] = marker
+    return comparison_df.drop("Z").with_columns(
+        [
+            pl.Series("P_Value", p_values, dtype=pl.Float64).fill_nan(None),
+            pl.Series("Significance", significance, dtype=pl.String),
+        ]
+    )
@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable
+
+
+class Overloaded(RuntimeError):
+    pass
+
+
+def configure_polars_threads(workers: int, threads_per_task: int | None = None) -> int:
+    # Polars has one thread pool per process, sized from POLARS_MAX_THREADS when polars is
+    # first imported, so this has to run before anything imports polars. It can't be
+    # limited per task: capping the shared pool at workers * threads_per_task keeps the
+    # pool's tasks, at most `workers` at a time, from all fighting over every core, and
+    # gives each about threads_per_task threads when they're all busy. A task running
+    # alone can use the whole cap. An explicit threads_per_task wins over a
+    # POLARS_MAX_THREADS already in the environment, the default doesn't.
+    if threads_per_task is not None:
+        os.environ["POLARS_MAX_THREADS"] = str(workers * threads_per_task)
+    else:
+        threads_per_task = max(1, (os.cpu_count() or 1) // workers)
+        os.environ.setdefault("POLARS_MAX_THREADS", str(workers * threads_per_task))
+    return int(os.environ["POLARS_MAX_THREADS"])
+
+
+# Runs heavy callback work on a fixed number of worker threads instead of in every web
+# request thread at once. At most max_workers tasks run and max_queue more wait; past
+# that, new work waits up to admission_timeout for a slot and then raises Overloaded, so
+# a burst of users can't pile up unbounded work. Results are kept in a small LRU cache
+# and cache hits are answered straight from the request thread without touching the
+# pool. Requests for a key that's already being computed wait for that result instead
+# of computing it again.
+class ComputePool:
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 16,
+        admission_timeout: float = 2.0,
+        cache_size: int = 256,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.admission_timeout = admission_timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="compute"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        # key -> Future of the computation running for it
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+            "in_flight": 0,
+            "running": 0,
+            "max_queue_depth": 0,
+            "queue_seconds": 0.0,
+            "run_seconds": 0.0,
+        }
+
+    def _count(self, **changes):
+        with self._lock:
+            for name, change in changes.items():
+                self._stats[name] += change
+
+    def run(self, fn: Callable, *args, **kwargs):
+        if not self._slots.acquire(timeout=self.admission_timeout):
+            self._count(rejected=1)
+            raise Overloaded(
+                f"{self.max_workers} tasks running and {self.max_queue} queued"
+            )
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["in_flight"] += 1
+            queue_depth = self._stats["in_flight"] - self._stats["running"] - 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], queue_depth
+            )
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            self._count(running=1, queue_seconds=started - submitted)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._count(running=-1, run_seconds=time.perf_counter() - started)
+
+        try:
+            result = self._executor.submit(task).result()
+        except Exception:
+            self._count(failed=1)
+            raise
+        else:
+            self._count(completed=1)
+            return result
+        finally:
+            self._count(in_flight=-1)
+            self._slots.release()
+
+    def cached(self, key: Hashable, fn: Callable, *args, **kwargs):
+        # key has to identify the result completely, including the dataset version
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats["cache_hits"] += 1
+                return self._cache[key]
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                self._in_flight[key] = future = Future()
+            else:
+                self._stats["coalesced"] += 1
+        if in_flight is not None:
+            # raises whatever the computation raised, Overloaded included
+            return in_flight.result()
+        try:
+            result = self.run(fn, *args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            self._cache[key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        future.set_result(result)
+        return result
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            cached = len(self._cache)
+        finished = stats["completed"] + stats["failed"]
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": stats["running"],
+            "queue_depth": stats["in_flight"] - stats["running"],
+            "max_queue_depth": stats["max_queue_depth"],
+            "submitted": stats["submitted"],
+            "completed": stats["completed"],
+            "failed": stats["failed"],
+            "rejected": stats["rejected"],
+            "cache_hits": stats["cache_hits"],
+            "coalesced": stats["coalesced"],
+            "cached_results": cached,
+            "mean_queue_ms": (
+                stats["queue_seconds"] / finished * 1000 if finished else 0
+            ),
+            "mean_run_ms": stats["run_seconds"] / finished * 1000 if finished else 0,
+            "polars_max_threads": int(os.environ.get("POLARS_MAX_THREADS", 0)) or None,
+        }
@@ -0,0 +1,93 @@
+import numpy as np
+import polars as pl
+
+# dimensions that can be selected, and the gamewise_df column each one reads
+game_dimensions = {
+    "Char": "Char",
+    "Stage": "Stage",
+    "Stage_Choice": "Stage_Choice",
+    "Outcome": "Win",
+}
+
+
+# Precomputed boolean masks over the game and set rows for every value of every
+# selectable dimension. Any combination of selections is then a bitwise AND of a
+# few masks followed by one filter, instead of re-running the df_utils chain.
+class CrossFilterIndex:
+    def __init__(self, setwise_df: pl.DataFrame, gamewise_df: pl.DataFrame):
+        self.n_sets = len(setwise_df)
+        self.n_games = len(gamewise_df)
+
+        # position of each game's set in setwise_df, to lift game masks to set masks
+        set_positions = pl.DataFrame(
+            {
+                "Row Index": setwise_df["Row Index"],
+                "Set Position": np.arange(self.n_sets),
+            }
+        )
+        game_set_position = (
+            gamewise_df.select("Row Index")
+            .join(set_positions, on="Row Index", how="left")["Set Position"]
+            .to_numpy()
+        )
+
+        self.game_masks: dict[str, dict] = {}
+        self.set_masks: dict[str, dict] = {}
+        for dimension, column in game_dimensions.items():
+            if dimension == "Outcome":
+                values = gamewise_df[column].fill_null(False).to_numpy()
+                self.game_masks[dimension] = {"W": values, "L": ~values}
+                continue
+            self.game_masks[dimension] = {}
+            self.set_masks[dimension] = {}
+            for value in gamewise_df[column].unique().drop_nulls():
+                game_mask = (gamewise_df[column] == value).to_numpy()
+                # a set matches if any of its games matches
+                set_mask = np.zeros(self.n_sets, dtype=bool)
+                set_mask[game_set_position[game_mask]] = True
+                self.game_masks[dimension][value] = game_mask
+                self.set_masks[dimension][value] = set_mask
+
+        set_wins = (setwise_df["Win/Loss"] == "W").fill_null(False).to_numpy()
+        self.set_masks["Outcome"] = {"W": set_wins, "L": ~set_wins}
+
+    @staticmethod
+    def _combine(masks: dict, selections: dict, size: int) -> np.ndarray | None:
+        combined = None
+        for dimension, value in selections.items():
+            if value is None or dimension not in masks:
+                continue
+            mask = masks[dimension].get(value)
+            if mask is None:
+                # nothing has ever matched this value
+                return np.zeros(size, dtype=bool)
+            combined = mask.copy() if combined is None else combined & mask
+        return combined
+
+    def game_mask(self, selections: dict) -> np.ndarray | None:
+        # None means no selection applies, so callers can skip filtering entirely
+        return self._combine(self.game_masks, selections, self.n_games)
+
+    def set_mask(self, selections: dict) -> np.ndarray | None:
+        return self._combine(self.set_masks, selections, self.n_sets)
+
+
+def apply_mask(df: pl.DataFrame, mask: np.ndarray | None) -> pl.DataFrame:
+    if mask is None:
+        return df
+    return df.filter(pl.Series(mask))
+
+
+def describe_selections(selections: dict) -> str:
+    labels = {
+        "Char": "Character",
+        "Stage": "Stage",
+        "Stage_Choice": "Stage Choice",
+        "Outcome": "Outcome",
+    }
+    active = [
+        f"{labels[dimension]}: {value}"
+        for dimension, value in selections.items()
+        if value is not None
+    ]
+    return "Filtering by " + ", ".join(active) if active else "No cross-filter selected"
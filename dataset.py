@@ -0,0 +1,356 @@
+import sys
+import threading
+import time
+from functools import partial
+from typing import Callable
+
+import plotly.graph_objects as go
+import polars as pl
+
+from df_utils import (
+    calculate_set_character_winrates,
+    calculate_stage_winrates,
+    calculate_counterpick_rankings,
+    calculate_elo_attribution,
+    calculate_game_character_winrates,
+    calculate_sessions,
+    calculate_stage_regressions,
+    calculate_winrate_timeseries,
+    elo_attribution_dimensions,
+    join_stage_metadata,
+)
+from game_data import stage_dimensions
+from graph_utils import (
+    character_setwise_bar_plot,
+    double_bar_plot_stages,
+    make_elo_attribution_bar,
+    make_elo_line_plot,
+    make_elo_mirror_histogram,
+    make_elo_scatter,
+    make_precomputed_boxplot,
+    make_session_plot,
+    make_set_outcome_bar,
+    make_stage_scatter,
+    make_transition_heatmap,
+)
+from storage import Storage
+from crossfilter import CrossFilterIndex
+from set_analytics import calculate_set_analytics
+from set_log import SetLog
+from recency import RecencyIndex
+from comparison import comparison_games
+from startup import run_graph
+
+
+def build_elo_scatter(setwise_df: pl.DataFrame) -> go.Figure:
+    return make_elo_scatter(
+        setwise_df=setwise_df,
+        title="My ELO vs. Opponent ELO",
+        x_title="My ELO",
+        y_title="Opponent ELO",
+    )
+
+
+def build_elo_histogram(setwise_df: pl.DataFrame) -> go.Figure:
+    return make_elo_mirror_histogram(
+        setwise_df=setwise_df,
+        x_label="ELO Difference",
+        y_label="Counts",
+        title="ELO Histogram",
+    )
+
+
+# elo-boxplot-split choices and the setwise_df column each one splits the boxes by
+boxplot_splits = {"All Sets": None, "By Outcome": "Win/Loss", "By Main": "Main"}
+
+
+def build_elo_boxplot(split: str, setwise_df: pl.DataFrame) -> go.Figure:
+    return make_precomputed_boxplot(
+        setwise_df=setwise_df,
+        title="Box-and-Whisker Plot of ELO Diff",
+        x_label="ELO Diff",
+        split_by=boxplot_splits[split],
+    )
+
+
+def build_elo_line_plot(setwise_df: pl.DataFrame) -> go.Figure:
+    return make_elo_line_plot(
+        x=setwise_df["Row Index"],
+        y=setwise_df["My ELO"],
+        title="ELO Over Time",
+        x_label="Set Number",
+        y_label="ELO",
+        df=setwise_df,
+    )
+
+
+def build_session_plot(sessions: dict) -> go.Figure:
+    return make_session_plot(
+        session_summary_df=sessions["summary"],
+        position_winrate_df=sessions["position_winrates"],
+        title="Play Sessions",
+    )
+
+
+def build_stage_bar(stage_winrate_df: pl.DataFrame) -> go.Figure:
+    return double_bar_plot_stages(
+        title="Stage Winrates Against All Characters",
+        stage_winrate_df=stage_winrate_df,
+        y1_name="Number of Matches",
+        y1_axis_label="Frequency of Stage",
+        y2_name="Winrate",
+        y2_axis_label="Winrate",
+    )
+
+
+def build_stage_dimension_scatter(
+    dimension: str, stage_scatter_df: pl.DataFrame, stage_regressions: dict
+) -> go.Figure:
+    return make_stage_scatter(
+        stage_scatter_df=stage_scatter_df,
+        regressions=stage_regressions,
+        title=f"Stage {dimension} vs. Winrate",
+        x_title=f"Stage {dimension}",
+        y_title="Winrate",
+        independent_var=dimension,
+    )
+
+
+def build_matchup_bar(character_set_winrate_df: pl.DataFrame) -> go.Figure:
+    matchup_bar = character_setwise_bar_plot(
+        title="Character Matchup Winrates By Set",
+        x_axis=character_set_winrate_df["Main"],
+        y1_axis=character_set_winrate_df["Total_Matches"],
+        y1_name="Number of Sets",
+        y1_axis_label="Number of Sets",
+        y2_axis=character_set_winrate_df["WinRate"],
+        y2_name="Winrate",
+        y2_axis_label="Winrate",
+    )
+    matchup_bar.update_layout(xaxis_title="Character (Main)")
+    return matchup_bar
+
+
+def build_set_outcome_bar(set_analytics: dict) -> go.Figure:
+    return make_set_outcome_bar(
+        summary_df=set_analytics["summary"],
+        counterpick_df=set_analytics["counterpick"],
+        title="Set Outcomes After Game 1 and Counterpicks",
+    )
+
+
+def build_transition_heatmap(set_analytics: dict) -> go.Figure:
+    return make_transition_heatmap(
+        transitions_df=set_analytics["transitions"],
+        title="Opponent Character Switches From Game 1 to Game 2",
+    )
+
+
+def build_elo_attribution_bar(dimension: str, elo_attribution: dict) -> go.Figure:
+    return make_elo_attribution_bar(
+        attribution_df=elo_attribution["net"][dimension],
+        title=f"Net ELO by {dimension}",
+        x_label=dimension,
+    )
+
+
+# the figures a freshly loaded page starts with, keyed by the dcc.Graph id they go in
+figure_builders = {
+    "elo-line-plot": (build_elo_line_plot, ["setwise_df"]),
+    "elo-scatter": (build_elo_scatter, ["setwise_df"]),
+    "elo-histogram": (build_elo_histogram, ["setwise_df"]),
+    "session-plot": (build_session_plot, ["sessions"]),
+    "character-bar": (build_matchup_bar, ["character_set_winrate_df"]),
+    "stage-bar-plot": (build_stage_bar, ["stage_winrate_df"]),
+    "set-outcome-bar": (build_set_outcome_bar, ["set_analytics"]),
+    "set-transition-heatmap": (build_transition_heatmap, ["set_analytics"]),
+}
+for split in boxplot_splits:
+    figure_builders[f"elo-boxplot-{split}"] = (
+        partial(build_elo_boxplot, split),
+        ["setwise_df"],
+    )
+for dimension in elo_attribution_dimensions:
+    figure_builders[f"elo-attribution-{dimension}"] = (
+        partial(build_elo_attribution_bar, dimension),
+        ["elo_attribution"],
+    )
+# every stage-stat-selector choice is prebuilt, so changing it is just a lookup
+for dimension in stage_dimensions:
+    figure_builders[f"stage-dimension-scatter-{dimension}"] = (
+        partial(build_stage_dimension_scatter, dimension),
+        ["stage_scatter_df", "stage_regressions"],
+    )
+
+
+class Dataset:
+    # everything derived from one read of the data, never mutated after it is built
+    def __init__(self, version: int, results: dict):
+        self.version = version
+        # the storage signature this was loaded at. Unlike version it doesn't start
+        # over when the server restarts and is the same in every worker
+        self.signature = results["signature"]
+        self.setwise_df: pl.DataFrame = results["setwise_df"]
+        self.gamewise_df: pl.DataFrame = results["gamewise_df"]
+        self.character_set_winrate_df: pl.DataFrame = results[
+            "character_set_winrate_df"
+        ]
+        self.stage_winrate_df: pl.DataFrame = results["stage_winrate_df"]
+        self.character_game_winrate_df: pl.DataFrame = results[
+            "character_game_winrate_df"
+        ]
+        self.stage_scatter_df: pl.DataFrame = results["stage_scatter_df"]
+        self.stage_regressions: dict = results["stage_regressions"]
+        self.winrate_timeseries_df: pl.DataFrame = results["winrate_timeseries_df"]
+        self.set_analytics: dict = results["set_analytics"]
+        self.sessions: dict = results["sessions"]
+        self.crossfilter: CrossFilterIndex = results["crossfilter"]
+        self.set_log: SetLog = results["set_log"]
+        self.recency: RecencyIndex = results["recency"]
+        self.counterpick_rankings: dict = results["counterpick_rankings"]
+        self.comparison_games: pl.DataFrame = results["comparison_games"]
+        self.elo_attribution: dict = results["elo_attribution"]
+        self.figures: dict[str, go.Figure] = {
+            name: results[name] for name in figure_builders
+        }
+
+    def __repr__(self):
+        return f"Dataset(Version={self.version}, Sets={len(self.setwise_df)})"
+
+
+def build_dataset(
+    version: int,
+    storage: Storage,
+    max_workers: int | None = None,
+    on_progress: Callable[[str, int, int], None] | None = None,
+) -> Dataset:
+    # loading, the aggregations and the figures as one dependency graph, so the
+    # independent builders (the icon scatter, the histogram, the box plot...) run
+    # side by side instead of one after another
+    nodes = {
+        "setwise_df": (storage.load_sets, []),
+        "gamewise_df": (storage.load_games, []),
+        # read once both loads finish, loading a spreadsheet may rewrite it
+        "signature": (
+            lambda *loaded: storage.signature(),
+            ["setwise_df", "gamewise_df"],
+        ),
+        "character_set_winrate_df": (calculate_set_character_winrates, ["setwise_df"]),
+        "stage_winrate_df": (calculate_stage_winrates, ["gamewise_df"]),
+        "character_game_winrate_df": (
+            calculate_game_character_winrates,
+            ["gamewise_df"],
+        ),
+        "stage_scatter_df": (join_stage_metadata, ["stage_winrate_df"]),
+        "stage_regressions": (calculate_stage_regressions, ["stage_scatter_df"]),
+        "winrate_timeseries_df": (calculate_winrate_timeseries, ["gamewise_df"]),
+        "set_analytics": (calculate_set_analytics, ["setwise_df"]),
+        "sessions": (calculate_sessions, ["setwise_df"]),
+        "crossfilter": (CrossFilterIndex, ["setwise_df", "gamewise_df"]),
+        "set_log": (SetLog, ["setwise_df"]),
+        "recency": (RecencyIndex, ["gamewise_df"]),
+        "counterpick_rankings": (calculate_counterpick_rankings, ["gamewise_df"]),
+        "comparison_games": (comparison_games, ["setwise_df", "gamewise_df"]),
+        "elo_attribution": (calculate_elo_attribution, ["setwise_df", "gamewise_df"]),
+        **figure_builders,
+    }
+    return Dataset(
+        version,
+        run_graph(
+            nodes,
+            max_workers=max_workers,
+            label=f"dataset v{version}",
+            on_progress=on_progress,
+        ),
+    )
+
+
+# A background thread loads the first dataset and then polls the storage's signature
+# (the spreadsheet's mtime and size, or the database's revision). When it changes the
+# new Dataset is built off the request path and swapped in with a single reference
+# assignment, so readers always see a complete dataset and polling clients only ever
+# pay for an integer comparison when nothing changed. Until the first load finishes
+# current is None and status/progress say how far along it is.
+class DatasetStore:
+    def __init__(self, storage: Storage, poll_seconds: float = 2.0):
+        self.storage = storage
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._signature = None
+        self.current: Dataset | None = None
+        self.status = "starting"
+        self.progress = {"done": 0, "total": 0, "last": None}
+        self.error: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.current is not None
+
+    def _on_progress(self, name: str, done: int, total: int):
+        self.progress = {"done": done, "total": total, "last": name}
+
+    @property
+    def version(self) -> int:
+        current = self.current
+        return current.version if current is not None else 0
+
+    @property
+    def signature(self):
+        current = self.current
+        return current.signature if current is not None else None
+
+    def reload(self) -> bool:
+        # returns True if a new dataset was swapped in
+        with self._lock:
+            signature = self.storage.signature()
+            if signature == self._signature:
+                return False
+            start = time.perf_counter()
+            if self.current is None:
+                self.status = "loading"
+            dataset = build_dataset(
+                self.version + 1, self.storage, on_progress=self._on_progress
+            )
+            # loading a spreadsheet may rewrite it to scrub private columns, the
+            # signature is read after that
+            self._signature = dataset.signature
+            self.current = dataset
+            self.status = "ready"
+            self.error = None
+        print(
+            f"Loaded {dataset} for {self.storage.player} in {time.perf_counter() - start:.2f}s",
+            file=sys.stderr,
+        )
+        return True
+
+    def _watch(self):
+        # the first pass runs straight away, that's the initial load
+        while True:
+            try:
+                self.reload()
+            except Exception as e:
+                # keep serving the last good dataset if the spreadsheet is mid-edit or broken
+                self.error = str(e)
+                if self.current is None:
+                    self.status = "failed"
+                print(
+                    f"Error: could not reload data for {self.storage.player}: {e}. Keeping dataset version {self.version}",
+                    file=sys.stderr,
+                )
+            if self._stop.wait(self.poll_seconds):
+                break
+
+    def start_watching(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._watch, name="dataset-watcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
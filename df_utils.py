@@ -1,18 +1,76 @@
 import polars as pl
 import sys
 from datetime import datetime
-from game_data import characters, all_stages, character_icons
+import numpy as np
+from game_data import (
+    characters,
+    all_stages,
+    starter_stages,
+    character_icons,
+    stage_metadata,
+    stage_dimensions,
+)
 
 pl.Config.set_tbl_rows(1000)
 pl.Config.set_tbl_cols(100)
 
 
+# the spreadsheet columns the pipeline uses and the types they are read as, anything
+# else in the file is never loaded. Date is read as text and parsed in the same query.
+spreadsheet_schema = {
+    "Date": pl.String,
+    "Time": pl.String,
+    "My ELO": pl.Int16,
+    "My Char": pl.String,
+    "Win/Loss": pl.String,
+    "Breakdown": pl.String,
+    "Ending ELO": pl.Int16,
+    "Opponent ELO": pl.Int16,
+    "Opponent Char": pl.String,
+    "G1 Stage": pl.String,
+    "G1 Stock Diff": pl.Int8,
+    "G2 Stage": pl.String,
+    "G2 Stock Diff": pl.Int8,
+    "G3 Stage": pl.String,
+    "G3 Stock Diff": pl.Int8,
+    "G2 char (if different)": pl.String,
+    "G3 char (if different)": pl.String,
+}
+# removing notes and game goals, these are priveleged information!
+private_columns = ["Notes", "Goal", "Opponent Name"]
+
+
+def scrub_private_columns(filepath: str, header: list[str]):
+    present = [column for column in private_columns if column in header]
+    if present:
+        # read as plain text so every other value is written back exactly as it was
+        df = pl.read_csv(filepath, separator="\t", infer_schema_length=0)
+        df.drop(present).write_csv(filepath, separator="\t")
+
+
 def parse_spreadsheet(filepath: str) -> pl.DataFrame:
-    df = pl.read_csv(filepath, separator="\t")
-    # removing notes and game goals, these are priveleged information!
-    if "Notes" in df.columns:
-        df = df.drop(["Notes", "Goal", "Opponent Name"])
-        df.write_csv(filepath, separator="\t")
+    header = pl.read_csv(filepath, separator="\t", n_rows=0).columns
+    scrub_private_columns(filepath, header)
+    missing = [column for column in spreadsheet_schema if column not in header]
+    if missing:
+        raise ValueError(
+            f"{filepath} is missing the spreadsheet columns {missing}, found {header}"
+        )
+    try:
+        df = (
+            pl.scan_csv(
+                filepath,
+                separator="\t",
+                schema_overrides=spreadsheet_schema,
+            )
+            .select(list(spreadsheet_schema))
+            .with_columns(pl.col("Date").str.strptime(pl.Date, format="%m/%d/%Y"))
+            .collect()
+        )
+    except pl.exceptions.PolarsError as e:
+        raise ValueError(
+            f"{filepath} has values that don't fit the spreadsheet schema: {e}"
+        ) from e
     # removing rows where it seems the set didn't happen, e.g. game bugs where it crashes or they forfeit before game 1 starts
     # these null values must be dropped so we can calculate the linear regression
     df = df.drop_nulls(["My Char", "My ELO", "Opponent ELO"])
@@ -37,7 +95,7 @@ def parse_spreadsheet(filepath: str) -> pl.DataFrame:
             if invalid_rows.any():
                 invalid_indices = invalid_rows.to_numpy().nonzero()[0]
                 for index in invalid_indices:
-                    value = df[column][index]
+                    value = df[column][int(index)]
                     print(
                         f"Error: Value '{value}' in column '{column}' at row {index} is not allowed. This row will be removed for the current analysis",
                         file=sys.stderr,
@@ -110,9 +168,6 @@ def parse_spreadsheet(filepath: str) -> pl.DataFrame:
             .alias("G3 Stage_Choice"),
         ]
     )
-    df = df.with_columns(
-        pl.col("Date").str.strptime(pl.Date, format="%m/%d/%Y").alias("Date")
-    )
     df = df.with_columns((pl.col("My ELO") - pl.col("Opponent ELO")).alias("ELO Diff"))
     df = df.with_columns(pl.col("Main").replace(character_icons).alias("Icon_Path"))
 
@@ -121,7 +176,7 @@ def parse_spreadsheet(filepath: str) -> pl.DataFrame:
 
 def calculate_gamewise_df(full_df: pl.DataFrame) -> pl.DataFrame:
     long_df = full_df.melt(
-        id_vars=["Date", "Time", "My ELO", "Opponent ELO", "Main"],
+        id_vars=["Row Index", "Date", "Time", "My ELO", "Opponent ELO", "Main"],
         value_vars=[
             "G1 Stage",
             "G1 Stock Diff",
@@ -150,7 +205,7 @@ def calculate_gamewise_df(full_df: pl.DataFrame) -> pl.DataFrame:
     )
 
     long_df = long_df.pivot(
-        index=["Date", "Time", "My ELO", "Opponent ELO", "Game", "Main"],
+        index=["Row Index", "Date", "Time", "My ELO", "Opponent ELO", "Game", "Main"],
         columns="Attribute",
         values="Value",
     )
@@ -181,6 +236,12 @@ def calculate_set_character_winrates(full_df: pl.DataFrame) -> pl.DataFrame:
     return winrate_df
 
 
+def percentage(part: str, whole: str) -> pl.Expr:
+    # null rather than NaN when whole is 0, e.g. a stage nobody counterpicked. Tables
+    # stay numeric, rounding and the % sign are left to the figures' hovertemplates.
+    return (pl.col(part) / pl.col(whole) * 100).fill_nan(None).cast(pl.Float32)
+
+
 def calculate_stage_winrates(gamewise_df: pl.DataFrame) -> pl.DataFrame:
     stage_winrate_df = (
         gamewise_df.group_by("Stage")
@@ -211,47 +272,17 @@ def calculate_stage_winrates(gamewise_df: pl.DataFrame) -> pl.DataFrame:
         )
         .with_columns(
             [
-                ((pl.col("Wins") / pl.col("Total_Matches") * 100).round(2)).alias(
-                    "WinRate"
+                percentage("Wins", "Total_Matches").alias("WinRate"),
+                percentage("Picks_Bans_Wins", "Picks_Bans").alias("Pick/Ban_Winrate"),
+                percentage("My_Counterpick_Wins", "My_Counterpick").alias(
+                    "My_Counterpick_Winrate"
+                ),
+                percentage("Their_Counterpick_Wins", "Their_Counterpick").alias(
+                    "Their_Counterpick_Winrate"
                 ),
-                (
-                    (pl.col("Picks_Bans_Wins") / pl.col("Picks_Bans") * 100).round(2)
-                ).alias("Pick/Ban_Winrate"),
-                (
-                    (
-                        pl.col("My_Counterpick_Wins") / pl.col("My_Counterpick") * 100
-                    ).round(2)
-                ).alias("My_Counterpick_Winrate"),
-                (
-                    (
-                        pl.col("Their_Counterpick_Wins")
-                        / pl.col("Their_Counterpick")
-                        * 100
-                    ).round(2)
-                ).alias("Their_Counterpick_Winrate"),
             ]
         )
     )
-    stage_winrate_df = stage_winrate_df.with_columns(
-        [
-            pl.when(pl.col("WinRate").is_not_nan())
-            .then((pl.col("WinRate").cast(str) + " %"))
-            .otherwise(pl.lit("N/A"))
-            .alias("WinRate_str"),
-            pl.when(pl.col("Pick/Ban_Winrate").is_not_nan())
-            .then((pl.col("Pick/Ban_Winrate").cast(str) + " %"))
-            .otherwise(pl.lit("N/A"))
-            .alias("Pick/Ban_Winrate"),
-            pl.when(pl.col("My_Counterpick_Winrate").is_not_nan())
-            .then((pl.col("My_Counterpick_Winrate").cast(str) + " %"))
-            .otherwise(pl.lit("N/A"))
-            .alias("My_Counterpick_Winrate"),
-            pl.when(pl.col("Their_Counterpick_Winrate").is_not_nan())
-            .then((pl.col("Their_Counterpick_Winrate").cast(str) + " %"))
-            .otherwise(pl.lit("N/A"))
-            .alias("Their_Counterpick_Winrate"),
-        ]
-    )
 
     return stage_winrate_df
 
@@ -272,9 +303,7 @@ def calculate_game_character_winrates(gamewise_df: pl.DataFrame) -> pl.DataFrame
                 pl.col("Win").count().alias("Total_Matches"),
             ]
         )
-        .with_columns(
-            ((pl.col("Wins") / pl.col("Total_Matches") * 100).round(2)).alias("WinRate")
-        )
+        .with_columns(percentage("Wins", "Total_Matches").alias("WinRate"))
     )
 
     main_vs_counterpick_df = gamewise_df.group_by(["Char", "Character_Pick"]).agg(
@@ -294,41 +323,406 @@ def calculate_game_character_winrates(gamewise_df: pl.DataFrame) -> pl.DataFrame
     final_df = character_winrate_df.join(main_vs_counterpick_df, on="Char", how="left")
 
     final_df = final_df.with_columns(
-        ((pl.col("Wins_Main") / pl.col("Total_Games_Main") * 100).round(2)).alias(
-            "WinRate_Main"
+        percentage("Wins_Main", "Total_Games_Main").alias("WinRate_Main"),
+        percentage("Wins_Counterpick", "Total_Games_Counterpick").alias(
+            "WinRate_Counterpick"
         ),
-        (
-            (
-                pl.col("Wins_Counterpick") / pl.col("Total_Games_Counterpick") * 100
-            ).round(2)
-        ).alias("WinRate_Counterpick"),
-        ((pl.col("Total_Games_Main") / pl.col("Total_Matches") * 100).round(2)).alias(
-            "Percent_Main"
+        percentage("Total_Games_Main", "Total_Matches").alias("Percent_Main"),
+        percentage("Total_Games_Counterpick", "Total_Matches").alias(
+            "Percent_Counterpick"
         ),
+    )
+
+    return final_df
+
+
+def join_stage_metadata(stage_winrate_df: pl.DataFrame) -> pl.DataFrame:
+    return stage_winrate_df.join(stage_metadata, on="Stage")
+
+
+def calculate_stage_regressions(stage_scatter_df: pl.DataFrame) -> dict:
+    # winrate against each stage dimension on its own, plus all of them together
+    x = stage_scatter_df.select(stage_dimensions).to_numpy().astype(np.float64)
+    y = stage_scatter_df["WinRate"].to_numpy().astype(np.float64)
+    n_stages, n_dimensions = x.shape
+
+    # every single-dimension fit in one batched solve of the 2x2 normal equations,
+    # one [x, 1] design matrix per dimension. A dimension that's the same on every
+    # played stage, e.g. only one stage played, has no slope: its fit is NaN and its
+    # prediction is the flat average winrate.
+    design = np.stack([x.T, np.ones((n_dimensions, n_stages))], axis=-1)
+    fitted = x.std(axis=0) > 0 if n_stages else np.zeros(n_dimensions, dtype=bool)
+    gram = design[fitted].transpose(0, 2, 1) @ design[fitted]
+    moments = design[fitted].transpose(0, 2, 1) @ y
+    fits = np.full((n_dimensions, 2), np.nan)
+    fits[fitted] = np.linalg.solve(gram, moments[..., None])[..., 0]
+    mean_winrate = y.mean() if n_stages else np.nan
+    predictions = np.full((n_dimensions, n_stages), mean_winrate)
+    predictions[fitted] = (design[fitted] @ fits[fitted][..., None])[..., 0]
+
+    # every stage at the same winrate leaves nothing to explain, so no R²
+    total_sum_of_squares = ((y - mean_winrate) ** 2).sum()
+
+    def r2(residuals: np.ndarray) -> float:
+        if not total_sum_of_squares > 0:
+            return np.nan
+        return 1 - (residuals**2).sum() / total_sum_of_squares
+
+    regressions = {}
+    for i, dimension in enumerate(stage_dimensions):
+        regressions[dimension] = {
+            "slope": fits[i, 0],
+            "intercept": fits[i, 1],
+            "r2": r2(y - predictions[i]) if fitted[i] else np.nan,
+            "predicted": predictions[i],
+        }
+
+    # needs more stages than coefficients, e.g. a character only seen on a few stages
+    if n_stages > n_dimensions + 1:
+        design = np.column_stack([x, np.ones(n_stages)])
+        coefficients, *_ = np.linalg.lstsq(design, y, rcond=None)
+        residuals = y - design @ coefficients
+        regressions["Multivariate"] = {
+            "coefficients": dict(zip(stage_dimensions, coefficients[:-1])),
+            "intercept": coefficients[-1],
+            "r2": r2(residuals),
+        }
+    else:
+        regressions["Multivariate"] = None
+    return regressions
+
+
+def calculate_winrate_timeseries(
+    gamewise_df: pl.DataFrame, windows: dict[str, str] | None = None
+) -> pl.DataFrame:
+    # winrate per opponent character and per stage in each time window, as one tidy
+    # frame with a row per (Window, Dimension, Value, Date)
+    if windows is None:
+        windows = {"Weekly": "1w", "Monthly": "1mo"}
+
+    # characters and stages stacked once per window, with each date moved back to the
+    # start of its period, so one daily group_by_dynamic buckets every window of both
+    # dimensions at once. Truncating keeps each group in date order, so only the games
+    # need sorting, not the stacked frame, and the labels are enums while it's grouped.
+    window_type = pl.Enum(list(windows))
+    dimension_type = pl.Enum(["Character", "Stage"])
+    dated_df = gamewise_df.select(["Date", "Char", "Stage", "Win"]).sort("Date")
+    long_df = pl.concat(
+        [
+            dated_df.select(
+                pl.lit(window, dtype=window_type).alias("Window"),
+                pl.lit(dimension, dtype=dimension_type).alias("Dimension"),
+                pl.col(column).alias("Value"),
+                pl.col("Date").dt.truncate(every),
+                "Win",
+            )
+            for window, every in windows.items()
+            for dimension, column in [("Character", "Char"), ("Stage", "Stage")]
+        ]
+    )
+
+    return (
+        long_df.group_by_dynamic(
+            "Date", every="1d", group_by=["Window", "Dimension", "Value"]
+        )
+        .agg(
+            [
+                pl.col("Win").sum().alias("Wins"),
+                pl.col("Win").count().alias("Total_Matches"),
+            ]
+        )
+        .with_columns(
+            pl.col(["Window", "Dimension"]).cast(pl.String),
+            percentage("Wins", "Total_Matches").alias("WinRate"),
+        )
+        .select(
+            ["Window", "Dimension", "Value", "Date", "Wins", "Total_Matches", "WinRate"]
+        )
+        .sort(["Window", "Dimension", "Value", "Date"])
+    )
+
+
+# the sheet has both 24 hour ("21:32") and 12 hour ("10:24:52 PM") times
+time_formats = ["%I:%M:%S %p", "%I:%M %p", "%H:%M:%S", "%H:%M"]
+
+
+def add_set_timestamps(setwise_df: pl.DataFrame) -> pl.DataFrame:
+    parsed_time = pl.coalesce(
+        [
+            pl.col("Time").str.strip_chars().str.strptime(pl.Time, fmt, strict=False)
+            for fmt in time_formats
+        ]
+    )
+    # sets without a time are assumed to follow the set before them on the same day,
+    # since the sheet is in the order the sets were played
+    return setwise_df.with_columns(
+        pl.col("Date")
+        .dt.combine(parsed_time)
+        .forward_fill()
+        .over("Date")
+        .fill_null(pl.col("Date").cast(pl.Datetime("us")))
+        .alias("Timestamp")
+    )
+
+
+def calculate_sessions(
+    setwise_df: pl.DataFrame, gap_minutes: int = 90
+) -> dict[str, pl.DataFrame]:
+    # a new session starts whenever more than gap_minutes passed since the last set
+    sessions_df = add_set_timestamps(setwise_df).with_columns(
         (
-            (pl.col("Total_Games_Counterpick") / pl.col("Total_Matches") * 100).round(2)
-        ).alias("Percent_Counterpick"),
+            pl.col("Timestamp").diff().is_null()
+            | (pl.col("Timestamp").diff() > pl.duration(minutes=gap_minutes))
+        )
+        .cum_sum()
+        .alias("Session")
+    )
+    sessions_df = sessions_df.with_columns(
+        (pl.int_range(pl.len()).over("Session") + 1).alias("Session Position"),
+        (pl.col("Win/Loss") == "W").alias("Set Win"),
     )
 
-    final_df = final_df.with_columns(
+    session_summary_df = (
+        sessions_df.group_by("Session", maintain_order=True)
+        .agg(
+            [
+                pl.col("Timestamp").first().alias("Start"),
+                pl.col("Timestamp").last().alias("End"),
+                pl.len().alias("Sets"),
+                pl.col("Set Win").sum().alias("Wins"),
+                pl.col("My ELO").drop_nulls().first().alias("Starting ELO"),
+                pl.col("Ending ELO").drop_nulls().last().alias("Ending ELO"),
+            ]
+        )
+        .with_columns(
+            # only what the session's own sets won or lost, so the current session has
+            # one too and a change between sessions isn't counted in either
+            (pl.col("Ending ELO") - pl.col("Starting ELO")).alias("ELO Change"),
+            (pl.col("Wins") / pl.col("Sets") * 100).round(2).alias("WinRate"),
+        )
+    )
+
+    position_winrate_df = (
+        sessions_df.group_by("Session Position")
+        .agg(
+            [
+                pl.col("Set Win").sum().alias("Wins"),
+                pl.len().alias("Total_Matches"),
+            ]
+        )
+        .with_columns(
+            (pl.col("Wins") / pl.col("Total_Matches") * 100).round(2).alias("WinRate")
+        )
+        .sort("Session Position")
+    )
+
+    return {
+        "sets": sessions_df,
+        "summary": session_summary_df,
+        "position_winrates": position_winrate_df,
+    }
+
+
+# the stages that can be chosen in each stage choice context
+counterpick_contexts = {
+    "My Counterpick": all_stages,
+    "Their Counterpick": all_stages,
+    "Picks/Bans": starter_stages,
+}
+
+
+def calculate_counterpick_rankings(
+    gamewise_df: pl.DataFrame,
+) -> dict[tuple[str, str], list[dict]]:
+    # Ranked stages for every (opponent character, stage choice context), keyed for a
+    # plain dict lookup. Each stage's winrate is shrunk toward the winrate against that
+    # character in that context over all stages (empirical Bayes with a beta prior), so
+    # a stage won 2 of 2 times doesn't jump above one won 30 of 45 times. Stages never
+    # played in a context are ranked at the prior.
+    games = gamewise_df.select(["Char", "Stage", "Stage_Choice", "Win"]).drop_nulls(
+        ["Char", "Stage", "Stage_Choice"]
+    )
+    games = pl.concat(
+        [games, games.with_columns(pl.lit("All Characters").alias("Char"))]
+    )
+    grid = pl.DataFrame({"Char": ["All Characters"] + characters}).join(
+        pl.DataFrame(
+            [
+                (context, stage)
+                for context, stages in counterpick_contexts.items()
+                for stage in stages
+            ],
+            schema=["Stage_Choice", "Stage"],
+            orient="row",
+        ),
+        how="cross",
+    )
+    cells = (
+        grid.join(
+            games.group_by(["Char", "Stage_Choice", "Stage"]).agg(
+                [pl.col("Win").sum().alias("Wins"), pl.len().alias("Games")]
+            ),
+            on=["Char", "Stage_Choice", "Stage"],
+            how="left",
+        )
+        .with_columns(pl.col("Wins").fill_null(0), pl.col("Games").fill_null(0))
+        .with_columns(
+            (
+                pl.col("Wins").sum().over(["Char", "Stage_Choice"])
+                / pl.col("Games").sum().over(["Char", "Stage_Choice"])
+            ).alias("Prior")
+        )
+        # characters never played in a context fall back to the context as a whole
+        .with_columns(
+            pl.col("Prior")
+            .fill_nan(None)
+            .fill_null(
+                pl.col("Wins").sum().over("Stage_Choice")
+                / pl.col("Games").sum().over("Stage_Choice")
+            )
+        )
+        .with_columns(pl.col("Prior").fill_nan(0.5))
+    )
+
+    # prior strength per context from the method of moments: the spread of the cell
+    # winrates around their priors, minus the spread expected from sampling alone
+    played = cells.filter(pl.col("Games") > 0)
+    strength = (
+        played.group_by("Stage_Choice")
+        .agg(
+            [
+                (
+                    (pl.col("Wins") / pl.col("Games") - pl.col("Prior")) ** 2
+                    - pl.col("Prior") * (1 - pl.col("Prior")) / pl.col("Games")
+                )
+                .mean()
+                .alias("Between_Variance"),
+                (pl.col("Prior") * (1 - pl.col("Prior")))
+                .mean()
+                .alias("Prior_Variance"),
+            ]
+        )
+        .with_columns(
+            (
+                pl.col("Prior_Variance")
+                / pl.col("Between_Variance").clip(lower_bound=1e-4)
+                - 1
+            )
+            .clip(2, 200)
+            .alias("Prior_Strength")
+        )
+        .select(["Stage_Choice", "Prior_Strength"])
+    )
+
+    rankings = (
+        cells.join(strength, on="Stage_Choice", how="left")
+        .with_columns(pl.col("Prior_Strength").fill_null(2))
+        .with_columns(
+            (
+                (pl.col("Wins") + pl.col("Prior_Strength") * pl.col("Prior"))
+                / (pl.col("Games") + pl.col("Prior_Strength"))
+                * 100
+            )
+            .round(2)
+            .alias("Shrunk_WinRate"),
+            pl.when(pl.col("Games") > 0)
+            .then((pl.col("Wins") / pl.col("Games") * 100).round(2))
+            .alias("WinRate"),
+        )
+        .sort(["Shrunk_WinRate", "Games"], descending=True)
+        .with_columns(
+            pl.int_range(1, pl.len() + 1).over(["Char", "Stage_Choice"]).alias("Rank")
+        )
+        .select(
+            [
+                "Char",
+                "Stage_Choice",
+                "Rank",
+                "Stage",
+                "Shrunk_WinRate",
+                "WinRate",
+                "Wins",
+                "Games",
+            ]
+        )
+    )
+    return {
+        key: group.drop(["Char", "Stage_Choice"]).to_dicts()
+        for key, group in rankings.partition_by(
+            ["Char", "Stage_Choice"], as_dict=True, maintain_order=True
+        ).items()
+    }
+
+
+# what net ELO is broken down by, and the gamewise_df column each reads
+elo_attribution_dimensions = {
+    "Character": "Char",
+    "Stage": "Stage",
+    "Stage Choice": "Stage_Choice",
+}
+
+
+# Each set's ELO change (Ending ELO - My ELO) is split evenly over the games played in
+# it and joined onto gamewise_df by Row Index once, so net ELO by any game column is a
+# single grouped sum over the same frame. Sets without an Ending ELO count for nothing.
+def calculate_elo_attribution(
+    setwise_df: pl.DataFrame, gamewise_df: pl.DataFrame
+) -> dict:
+    set_changes = setwise_df.lazy().select(
         [
-            pl.when(pl.col("WinRate").is_not_nan())
-            .then((pl.col("WinRate").cast(str) + " %"))
-            .otherwise(pl.lit("N/A"))
-            .alias("WinRate_str"),
-            pl.when(pl.col("WinRate_Main").is_not_nan())
-            .then((pl.col("WinRate_Main").cast(str) + " %"))
-            .otherwise(pl.lit("N/A")),
-            pl.when(pl.col("WinRate_Counterpick").is_not_nan())
-            .then((pl.col("WinRate_Counterpick").cast(str) + " %"))
-            .otherwise(pl.lit("N/A")),
-            pl.when(pl.col("Percent_Main").is_not_nan())
-            .then((pl.col("Percent_Main").cast(str) + " %"))
-            .otherwise(pl.lit("N/A")),
-            pl.when(pl.col("Percent_Counterpick").is_not_nan())
-            .then((pl.col("Percent_Counterpick").cast(str) + " %"))
-            .otherwise(pl.lit("N/A")),
+            "Row Index",
+            (pl.col("Ending ELO").cast(pl.Int32) - pl.col("My ELO")).alias(
+                "ELO Change"
+            ),
         ]
     )
+    games = (
+        gamewise_df.lazy()
+        .select(["Row Index", *elo_attribution_dimensions.values()])
+        .join(set_changes, on="Row Index", how="left")
+        .with_columns(
+            (pl.col("ELO Change") / pl.len().over("Row Index")).alias("ELO Share")
+        )
+    )
+    net_queries = [
+        games.group_by(pl.col(column).alias("Value"))
+        .agg(
+            [
+                pl.col("ELO Share").sum().alias("Net ELO"),
+                pl.col("ELO Share").count().alias("Games"),
+            ]
+        )
+        .with_columns(
+            (pl.col("Net ELO") / pl.col("Games")).fill_nan(None).alias("ELO per Game")
+        )
+        .sort("Net ELO", descending=True)
+        for column in elo_attribution_dimensions.values()
+    ]
+
+    # every set should start from the ELO the one before it ended on, a gap means a
+    # set is missing (e.g. dropped by the validation above) or mistyped
+    continuity_query = (
+        setwise_df.lazy()
+        .sort("Row Index")
+        .select(
+            [
+                "Row Index",
+                "Date",
+                "Time",
+                pl.col("Ending ELO").shift(1).alias("Previous Ending ELO"),
+                "My ELO",
+            ]
+        )
+        .with_columns(
+            (pl.col("My ELO").cast(pl.Int32) - pl.col("Previous Ending ELO")).alias(
+                "Gap"
+            )
+        )
+        .filter(pl.col("Gap") != 0)
+    )
 
-    return final_df
+    *net_dfs, continuity_df = pl.collect_all([*net_queries, continuity_query])
+    return {
+        "net": dict(zip(elo_attribution_dimensions, net_dfs)),
+        "continuity": continuity_df,
+    }
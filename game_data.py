@@ -1,3 +1,6 @@
+import polars as pl
+
+
 # stages
 class Stage:
     def __init__(self, name, width, side_blast, top_blast, bot_blast):
@@ -58,6 +61,24 @@ stages = {
         name="Tempest Peak", width=1250, side_blast=1645, top_blast=2260, bot_blast=1250
     ),
 }
+# one row per stage with every dimension, built once so nothing has to rebuild it per chart
+stage_metadata = pl.DataFrame(
+    {
+        "Stage": [stage.name for stage in stages.values()],
+        "Stage_Width": [stage.width for stage in stages.values()],
+        "Top_Blast": [stage.top_blast for stage in stages.values()],
+        "Side_Blast": [stage.side_blast for stage in stages.values()],
+        "Bot_Blast": [stage.bot_blast for stage in stages.values()],
+    }
+)
+# stage_metadata's dimension columns and how the dashboard and reports name them
+stage_dimension_labels = {
+    "Stage_Width": "Width",
+    "Top_Blast": "Top Blastzone",
+    "Side_Blast": "Side Blastzone",
+    "Bot_Blast": "Bottom Blastzone",
+}
+stage_dimensions = list(stage_dimension_labels)
 starter_stages = [
     "Aetherean Forest",
     "Godai Delta",
@@ -2,9 +2,62 @@ from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score
 import polars as pl
 import plotly.graph_objects as go
-from game_data import all_stages, character_icons, stages
-from PIL import Image
+from plotly.subplots import make_subplots
+from dash import Patch
+from game_data import all_stages, character_icons
 import numpy as np
+import base64
+from functools import lru_cache
+
+# the stage_winrate_df columns behind both stage bars' hover text
+stage_bar_customdata = [
+    "Picks_Bans",
+    "My_Counterpick",
+    "Their_Counterpick",
+    "Pick/Ban_Winrate",
+    "My_Counterpick_Winrate",
+    "Their_Counterpick_Winrate",
+]
+# the character_game_winrate_df columns behind each gamewise matchup bar's hover text
+character_game_bar_customdata = (
+    [
+        "Total_Games_Main",
+        "Total_Games_Counterpick",
+        "Percent_Main",
+        "Percent_Counterpick",
+    ],
+    ["WinRate_Main", "WinRate_Counterpick"],
+)
+# customdata columns holding 0-100 percentages
+percent_customdata = {
+    "Pick/Ban_Winrate",
+    "My_Counterpick_Winrate",
+    "Their_Counterpick_Winrate",
+    "Percent_Main",
+    "Percent_Counterpick",
+    "WinRate_Main",
+    "WinRate_Counterpick",
+}
+
+
+def hover_customdata(df: pl.DataFrame, columns: list[str]) -> list[dict]:
+    # One dict per bar, read by name in the hovertemplates, with percentages as fractions
+    # for d3's .2% format, rounded to what that shows. Nulls are left out of the dict so
+    # the hover shows the trace's hovertemplatefallback, a null itself would be
+    # formatted as 0%.
+    return [
+        {column: value for column, value in row.items() if value is not None}
+        for row in df.select(
+            [
+                (
+                    (pl.col(column).cast(pl.Float64) / 100).round(4)
+                    if column in percent_customdata
+                    else pl.col(column)
+                )
+                for column in columns
+            ]
+        ).to_dicts()
+    ]
 
 
 def double_bar_plot_stages(
@@ -18,16 +71,7 @@ def double_bar_plot_stages(
     y2_name: str,
     y2_axis_label: str,
 ) -> go.Figure:
-    customdata = stage_winrate_df[
-        [
-            "Picks_Bans",
-            "My_Counterpick",
-            "Their_Counterpick",
-            "Pick/Ban_Winrate",
-            "My_Counterpick_Winrate",
-            "Their_Counterpick_Winrate",
-        ]
-    ].to_numpy()
+    customdata = hover_customdata(stage_winrate_df, stage_bar_customdata)
     double_bar = go.Figure(
         data=[
             go.Bar(
@@ -40,9 +84,9 @@ def double_bar_plot_stages(
                 hovertemplate=(
                     "Stage: %{x}<br>"
                     "Total Matches: %{y}<br>"
-                    "Picks/Bans: %{customdata[0]}<br>"
-                    "My Counterpick: %{customdata[1]}<br>"
-                    "Their Counterpick: %{customdata[2]}<br>"
+                    "Picks/Bans: %{customdata.Picks_Bans}<br>"
+                    "My Counterpick: %{customdata.My_Counterpick}<br>"
+                    "Their Counterpick: %{customdata.Their_Counterpick}<br>"
                     "<extra></extra>"
                 ),
             ),
@@ -55,12 +99,14 @@ def double_bar_plot_stages(
                 customdata=customdata,
                 hovertemplate=(
                     "Stage: %{x}<br>"
-                    "Winrate: %{y}%<br>"
-                    "Picks/Bans Winrate: %{customdata[3]}<br>"
-                    "My Counterpick Winrate: %{customdata[4]}<br>"
-                    "Their Counterpick Winrate: %{customdata[5]}<br>"
+                    "Winrate: %{y:.2f}%<br>"
+                    "Picks/Bans Winrate: %{customdata.Pick/Ban_Winrate:.2%}<br>"
+                    "My Counterpick Winrate: %{customdata.My_Counterpick_Winrate:.2%}<br>"
+                    "Their Counterpick Winrate: "
+                    "%{customdata.Their_Counterpick_Winrate:.2%}<br>"
                     "<extra></extra>"
                 ),
+                hovertemplatefallback="N/A",
             ),
         ],
         layout={
@@ -99,23 +145,18 @@ def character_gamewise_bar_plot(
                 y=y1_axis.to_list(),
                 yaxis="y",
                 offsetgroup=1,
-                customdata=df[
-                    [
-                        "Total_Games_Main",
-                        "Total_Games_Counterpick",
-                        "Percent_Main",
-                        "Percent_Counterpick",
-                    ]
-                ],
+                customdata=hover_customdata(df, character_game_bar_customdata[0]),
                 hovertemplate=(
                     "Opponent Character: %{x}<br>"
                     "Total Games: %{y}<br>"
-                    "# Games Against Main: %{customdata[0]}<br>"
-                    "(%{customdata[2]} of Total Games)<br>"
-                    "# Games Against Counterpick: %{customdata[1]}<br>"
-                    "(%{customdata[3]} of Total Games)<br>"
+                    "# Games Against Main: %{customdata.Total_Games_Main}<br>"
+                    "(%{customdata.Percent_Main:.2%} of Total Games)<br>"
+                    "# Games Against Counterpick: "
+                    "%{customdata.Total_Games_Counterpick}<br>"
+                    "(%{customdata.Percent_Counterpick:.2%} of Total Games)<br>"
                     "<extra></extra>"
                 ),
+                hovertemplatefallback="N/A",
             ),
             go.Bar(
                 name=y2_name,
@@ -123,14 +164,16 @@ def character_gamewise_bar_plot(
                 y=y2_axis.to_list(),
                 yaxis="y2",
                 offsetgroup=2,
-                customdata=df[["WinRate_Main", "WinRate_Counterpick"]],
+                customdata=hover_customdata(df, character_game_bar_customdata[1]),
                 hovertemplate=(
                     "Opponent Character: %{x}<br>"
-                    "Winrate: %{y}%<br>"
-                    "Winrate Against Main: %{customdata[0]}<br>"
-                    "Winrate Against Counterpick: %{customdata[1]}<br>"
+                    "Winrate: %{y:.2f}%<br>"
+                    "Winrate Against Main: %{customdata.WinRate_Main:.2%}<br>"
+                    "Winrate Against Counterpick: "
+                    "%{customdata.WinRate_Counterpick:.2%}<br>"
                     "<extra></extra>"
                 ),
+                hovertemplatefallback="N/A",
             ),
         ],
         layout={
@@ -182,7 +225,7 @@ def character_setwise_bar_plot(
                 offsetgroup=2,
                 hovertemplate=(
                     "Opponent Character: %{x}<br>"
-                    "Winrate: %{y}%<br>"
+                    "Winrate: %{y:.2f}%<br>"
                     "<extra></extra>"
                 ),
             ),
@@ -204,6 +247,79 @@ def character_setwise_bar_plot(
     return double_bar
 
 
+# The double bar charts keep their layout, hover templates, axes and 50% line between
+# filter changes, only the bars and the title move. Once a chart is on screen these
+# build a dash.Patch of just the trace arrays and title, so the browser keeps the
+# figure and updates it in place instead of being sent and re-rendering a new one.
+def patch_double_bar(
+    title: str,
+    x_axis: list,
+    y1_axis: list,
+    y2_axis: list,
+    customdata: tuple[list | None, list | None] = (None, None),
+) -> Patch:
+    patch = Patch()
+    patch["layout"]["title"]["text"] = title
+    for trace, y_axis, trace_customdata in zip((0, 1), (y1_axis, y2_axis), customdata):
+        patch["data"][trace]["x"] = x_axis
+        patch["data"][trace]["y"] = y_axis
+        if trace_customdata is not None:
+            patch["data"][trace]["customdata"] = trace_customdata
+    return patch
+
+
+def patch_double_bar_plot_stages(title: str, stage_winrate_df: pl.DataFrame) -> Patch:
+    customdata = hover_customdata(stage_winrate_df, stage_bar_customdata)
+    return patch_double_bar(
+        title,
+        stage_winrate_df["Stage"].to_list(),
+        stage_winrate_df["Total_Matches"].to_list(),
+        stage_winrate_df["WinRate"].to_list(),
+        (customdata, customdata),
+    )
+
+
+def patch_character_setwise_bar_plot(
+    title: str, x_axis: pl.Series, y1_axis: pl.Series, y2_axis: pl.Series
+) -> Patch:
+    return patch_double_bar(
+        title, x_axis.to_list(), y1_axis.to_list(), y2_axis.to_list()
+    )
+
+
+def patch_character_gamewise_bar_plot(
+    title: str,
+    x_axis: pl.Series,
+    y1_axis: pl.Series,
+    y2_axis: pl.Series,
+    df: pl.DataFrame,
+) -> Patch:
+    return patch_double_bar(
+        title,
+        x_axis.to_list(),
+        y1_axis.to_list(),
+        y2_axis.to_list(),
+        tuple(
+            hover_customdata(df, columns) for columns in character_game_bar_customdata
+        ),
+    )
+
+
+def patch_from_figure(figure: go.Figure) -> Patch:
+    # the same update for a double bar chart that's already been built
+    y1_bars, y2_bars = figure.data
+    return patch_double_bar(
+        figure.layout.title.text,
+        list(y1_bars.x),
+        list(y1_bars.y),
+        list(y2_bars.y),
+        tuple(
+            None if bars.customdata is None else list(bars.customdata)
+            for bars in (y1_bars, y2_bars)
+        ),
+    )
+
+
 def scatterplot_with_regression(
     independent: pl.Series, dependent: pl.Series, title: str, x_title: str, y_title: str
 ) -> go.Figure:
@@ -353,6 +469,13 @@ def make_elo_mirror_histogram(
     return fig
 
 
+@lru_cache(maxsize=None)
+def icon_data_uri(png_path: str) -> str:
+    # encoding each icon once instead of letting plotly re-encode a PIL image for every set
+    with open(png_path, "rb") as f:
+        return "data:image/png;base64," + base64.b64encode(f.read()).decode("ascii")
+
+
 def scatterplot_with_icons(
     independent: pl.Series,
     dependent: pl.Series,
@@ -360,6 +483,7 @@ def scatterplot_with_icons(
     x_title: str,
     y_title: str,
     df: pl.DataFrame,
+    icon_urls: dict[str, str] | None = None,
 ) -> go.Figure:
     x = independent.to_numpy().reshape(-1, 1)
     y = dependent.to_numpy()
@@ -401,18 +525,29 @@ def scatterplot_with_icons(
             line=dict(color="red", width=2, dash="dash"),
         )
     )
-    for x, y, png in zip(scatter.data[0].x, scatter.data[0].y, df["Icon_Path"]):
-        scatter.add_layout_image(
-            x=x,
-            y=y,
-            source=Image.open(png),
-            xref="x",
-            yref="y",
-            sizex=40,
-            sizey=40,
-            xanchor="center",
-            yanchor="middle",
-        )
+    # icon_urls lets static reports point at shared icon files instead of
+    # embedding a base64 copy of the icon for every single set
+    if icon_urls is None:
+        icon_sources = [icon_data_uri(png) for png in df["Icon_Path"]]
+    else:
+        icon_sources = df["Main"].replace_strict(icon_urls, default=None).to_list()
+    # setting every image in one go, add_layout_image revalidates the whole list per call
+    scatter.update_layout(
+        images=[
+            dict(
+                x=x,
+                y=y,
+                source=source,
+                xref="x",
+                yref="y",
+                sizex=40,
+                sizey=40,
+                xanchor="center",
+                yanchor="middle",
+            )
+            for x, y, source in zip(scatter.data[0].x, scatter.data[0].y, icon_sources)
+        ]
+    )
 
     scatter.update_layout(
         title=title,
@@ -424,6 +559,249 @@ def scatterplot_with_icons(
     return scatter
 
 
+def elo_density_heatmap(
+    independent: pl.Series,
+    dependent: pl.Series,
+    title: str,
+    x_title: str,
+    y_title: str,
+    df: pl.DataFrame,
+    bins: int = 40,
+) -> go.Figure:
+    # the sets binned into a bins x bins grid, so the figure is the same size however
+    # many sets there are. Buttons switch between coloring by set count and by winrate.
+    x = independent.cast(pl.Float64).to_numpy()
+    y = dependent.cast(pl.Float64).to_numpy()
+    wins = (df["Win/Loss"] == "W").fill_null(False).to_numpy()
+    x_edges = np.histogram_bin_edges(x, bins=bins)
+    y_edges = np.histogram_bin_edges(y, bins=bins)
+    counts, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges])
+    win_counts, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges], weights=wins)
+    # histogram2d is indexed [x, y], heatmaps want rows of y
+    counts, win_counts = counts.T, win_counts.T
+    occupied = counts > 0
+    winrates = np.full(counts.shape, np.nan)
+    winrates[occupied] = (win_counts[occupied] / counts[occupied] * 100).round(2)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    customdata = np.dstack([np.where(occupied, counts, np.nan), winrates])
+    hovertemplate = (
+        "My ELO: %{x:.0f}<br>"
+        "Opponent ELO: %{y:.0f}<br>"
+        "Sets: %{customdata[0]}<br>"
+        "Winrate: %{customdata[1]}%<br>"
+        "<extra></extra>"
+    )
+
+    density = go.Figure()
+    density.add_trace(
+        go.Heatmap(
+            x=x_centers,
+            y=y_centers,
+            z=np.where(occupied, counts, np.nan),
+            customdata=customdata,
+            colorscale="Blues",
+            colorbar={"title": "Sets"},
+            name="Sets",
+            hovertemplate=hovertemplate,
+        )
+    )
+    density.add_trace(
+        go.Heatmap(
+            x=x_centers,
+            y=y_centers,
+            z=winrates,
+            customdata=customdata,
+            colorscale="RdBu",
+            zmin=0,
+            zmax=100,
+            colorbar={"title": "Winrate"},
+            name="Winrate",
+            hovertemplate=hovertemplate,
+            visible=False,
+        )
+    )
+    # the fit still uses every set, but only its two end points are sent
+    m, b = np.polyfit(x, y, 1)
+    r2 = 1 - np.sum((y - (m * x + b)) ** 2) / np.sum((y - y.mean()) ** 2)
+    line_x = np.array([x.min(), x.max()])
+    density.add_trace(
+        go.Scatter(
+            x=line_x,
+            y=m * line_x + b,
+            mode="lines",
+            name=f"Best Fit: y = {m:.2f}x + {b:.2f} (R² = {r2:.2f})",
+            line=dict(color="red", width=2, dash="dash"),
+        )
+    )
+    density.update_layout(
+        title=title,
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        legend_title="Legend",
+        template="plotly_white",
+        updatemenus=[
+            dict(
+                type="buttons",
+                direction="right",
+                x=0,
+                y=1.12,
+                xanchor="left",
+                buttons=[
+                    dict(
+                        label="Color by Sets",
+                        method="restyle",
+                        args=[{"visible": [True, False, True]}],
+                    ),
+                    dict(
+                        label="Color by Winrate",
+                        method="restyle",
+                        args=[{"visible": [False, True, True]}],
+                    ),
+                ],
+            )
+        ],
+    )
+    return density
+
+
+def make_elo_scatter(
+    setwise_df: pl.DataFrame,
+    title: str,
+    x_title: str,
+    y_title: str,
+    icon_urls: dict[str, str] | None = None,
+    density_threshold: int = 2000,
+) -> go.Figure:
+    # one icon per set stops being readable (and gets heavy) past a few thousand sets
+    if len(setwise_df) > density_threshold:
+        return elo_density_heatmap(
+            independent=setwise_df["My ELO"],
+            dependent=setwise_df["Opponent ELO"],
+            title=title,
+            x_title=x_title,
+            y_title=y_title,
+            df=setwise_df,
+        )
+    return scatterplot_with_icons(
+        independent=setwise_df["My ELO"],
+        dependent=setwise_df["Opponent ELO"],
+        title=title,
+        x_title=x_title,
+        y_title=y_title,
+        df=setwise_df,
+        icon_urls=icon_urls,
+    )
+
+
+def make_precomputed_boxplot(
+    setwise_df: pl.DataFrame,
+    title: str,
+    x_label: str,
+    value_column: str = "ELO Diff",
+    split_by: str | None = None,
+    max_outliers: int = 100,
+) -> go.Figure:
+    # quartiles and Tukey fences (the furthest points within 1.5 IQR of the box) are
+    # worked out here, so only the box statistics and the outliers are sent instead of
+    # every set. split_by draws one box per value of that column, and each box shows at
+    # most max_outliers of its most extreme outliers.
+    group = pl.lit(value_column) if split_by is None else pl.col(split_by)
+    value = pl.col(value_column)
+    df = (
+        setwise_df.lazy()
+        .with_columns(group.cast(pl.String).alias("Box"))
+        .drop_nulls([value_column, "Box"])
+        .with_columns(
+            value.quantile(0.25, interpolation="linear").over("Box").alias("q1"),
+            value.quantile(0.75, interpolation="linear").over("Box").alias("q3"),
+        )
+        .with_columns(
+            (
+                (value < pl.col("q1") - 1.5 * (pl.col("q3") - pl.col("q1")))
+                | (value > pl.col("q3") + 1.5 * (pl.col("q3") - pl.col("q1")))
+            ).alias("Outlier")
+        )
+    )
+    stats, outliers = pl.collect_all(
+        [
+            df.group_by("Box")
+            .agg(
+                [
+                    pl.col("q1").first(),
+                    value.median().alias("median"),
+                    pl.col("q3").first(),
+                    value.mean().alias("mean"),
+                    value.filter(~pl.col("Outlier")).min().alias("lowerfence"),
+                    value.filter(~pl.col("Outlier")).max().alias("upperfence"),
+                ]
+            )
+            .sort("Box"),
+            df.filter(pl.col("Outlier"))
+            .sort(
+                (value - (pl.col("q1") + pl.col("q3")) / 2).abs(),
+                descending=True,
+            )
+            .group_by("Box", maintain_order=True)
+            .head(max_outliers)
+            .select(
+                [
+                    "Box",
+                    value_column,
+                    "Main",
+                    "Win/Loss",
+                    "Breakdown",
+                    "My ELO",
+                    "Opponent ELO",
+                ]
+            ),
+        ]
+    )
+
+    boxplot = go.Figure(
+        go.Box(
+            y=stats["Box"],
+            q1=stats["q1"],
+            median=stats["median"],
+            q3=stats["q3"],
+            mean=stats["mean"],
+            lowerfence=stats["lowerfence"],
+            upperfence=stats["upperfence"],
+            orientation="h",
+            marker=dict(color="green"),
+            name=value_column,
+            showlegend=False,
+        )
+    )
+    boxplot.add_trace(
+        go.Scatter(
+            x=outliers[value_column],
+            y=outliers["Box"],
+            mode="markers",
+            marker=dict(color="green"),
+            name="Outliers",
+            customdata=outliers[
+                ["Main", "Win/Loss", "Breakdown", "My ELO", "Opponent ELO"]
+            ],
+            hovertemplate=(
+                "Opponent Main: %{customdata[0]}<br>"
+                "Opponent ELO: %{customdata[4]}<br>"
+                "My ELO: %{customdata[3]}<br>"
+                "Set Outcome: %{customdata[1]}<br>"
+                "Game Breakdown: %{customdata[2]}<br>"
+                "<extra></extra>"
+            ),
+        )
+    )
+
+    boxplot.update_layout(
+        title=title,
+        xaxis_title=x_label,
+        template="plotly_white",
+    )
+    return boxplot
+
+
 def add_50_percent_line(fig: go.Figure):
     fig.add_shape(
         type="line",
@@ -550,39 +928,22 @@ def elo_double_line_plot(
 
 
 def make_stage_scatter(
-    stage_winrate_df: pl.DataFrame,
+    stage_scatter_df: pl.DataFrame,
+    regressions: dict,
     title: str,
     x_title: str,
     y_title: str,
     independent_var: str,
     # dependent: pl.Series,
 ) -> go.Figure:
-
-    stages_df = pl.DataFrame(
-        {
-            "Stage": list(stages.keys()),
-            "Stage_Width": [stages[stage].width for stage in stages],
-            "Top_Blast": [stages[stage].top_blast for stage in stages],
-            "Bot_Blast": [stages[stage].top_blast for stage in stages],
-            "Side_Blast": [stages[stage].side_blast for stage in stages],
-        }
-    )
-    stage_scatter_df = stage_winrate_df.join(stages_df, on="Stage")
+    # stage_scatter_df and regressions come from df_utils.join_stage_metadata and
+    # df_utils.calculate_stage_regressions, computed once per dataset
     independent = stage_scatter_df[independent_var]
     dependent = stage_scatter_df["WinRate"]
-    x = independent.to_numpy().reshape(-1, 1)
-    y = dependent.to_numpy()
-
-    # print(dimension_series)
-    # print(dependent)
-
-    model = LinearRegression()
-    model.fit(x, y)
-
-    y_pred = model.predict(x)
-    m = model.coef_[0]
-    b = model.intercept_
-    r2 = r2_score(y, y_pred)
+    regression = regressions[independent_var]
+    m = regression["slope"]
+    b = regression["intercept"]
+    r2 = regression["r2"]
 
     scatter = go.Figure()
 
@@ -598,7 +959,7 @@ def make_stage_scatter(
                 "Stage: %{customdata[0]}<br>"
                 f"{independent_var}: "
                 "%{x}<br>"
-                "Winrate: %{y}<br>"
+                "Winrate: %{y:.2f}%<br>"
                 "<extra></extra>"
             ),
         )
@@ -606,13 +967,24 @@ def make_stage_scatter(
     scatter.add_trace(
         go.Scatter(
             x=independent.to_list(),
-            y=y_pred.tolist(),
+            y=regression["predicted"].tolist(),
             mode="lines",
             name=f"Best Fit: y = {m:.2f}x + {b:.2f} (R² = {r2:.2f})",
             line=dict(color="red", width=2, dash="dash"),
         )
     )
 
+    multivariate = regressions.get("Multivariate")
+    if multivariate is not None:
+        scatter.add_annotation(
+            text=f"All dimensions together: R² = {multivariate['r2']:.2f}",
+            xref="paper",
+            yref="paper",
+            x=0,
+            y=1.05,
+            showarrow=False,
+        )
+
     scatter.update_layout(
         title=title,
         xaxis_title=x_title,
@@ -622,3 +994,347 @@ def make_stage_scatter(
     )
 
     return scatter
+
+
+def make_winrate_small_multiples(
+    timeseries_df: pl.DataFrame, title: str, y_label: str, columns: int = 5
+) -> go.Figure:
+    # one small line chart per character or stage, all on the same winrate scale
+    values = timeseries_df["Value"].unique().sort().to_list()
+    rows = max(1, -(-len(values) // columns))
+    fig = make_subplots(
+        rows=rows,
+        cols=columns,
+        subplot_titles=values,
+        shared_yaxes=True,
+        vertical_spacing=0.12,
+    )
+    for i, value in enumerate(values):
+        value_df = timeseries_df.filter(pl.col("Value") == value)
+        fig.add_trace(
+            go.Scatter(
+                x=value_df["Date"],
+                y=value_df["WinRate"],
+                mode="lines+markers",
+                name=value,
+                showlegend=False,
+                customdata=value_df[["Wins", "Total_Matches"]],
+                hovertemplate=(
+                    f"{value}<br>"
+                    "Period Starting: %{x}<br>"
+                    "Winrate: %{y:.2f}%<br>"
+                    "Games Won: %{customdata[0]} of %{customdata[1]}<br>"
+                    "<extra></extra>"
+                ),
+            ),
+            row=i // columns + 1,
+            col=i % columns + 1,
+        )
+    fig.update_yaxes(range=[0, 100])
+    fig.update_yaxes(title_text=y_label, col=1)
+    fig.update_layout(title=title, template="plotly_white", height=300 * rows)
+    return fig
+
+
+def make_empty_figure(title: str, message: str) -> go.Figure:
+    # blank axes with a note in the middle, for charts with nothing to plot
+    fig = go.Figure()
+    fig.add_annotation(
+        text=message,
+        xref="paper",
+        yref="paper",
+        x=0.5,
+        y=0.5,
+        showarrow=False,
+        font={"size": 16},
+    )
+    fig.update_layout(
+        title=title,
+        xaxis={"visible": False},
+        yaxis={"visible": False},
+        template="plotly_white",
+    )
+    return fig
+
+
+def make_transition_heatmap(transitions_df: pl.DataFrame, title: str) -> go.Figure:
+    if transitions_df.is_empty():
+        # nothing to pivot until some set has reached game 2
+        return make_empty_figure(title, "No sets reached game 2")
+    # rows are the opponent's game 1 character, columns their game 2 character
+    matrix = transitions_df.pivot(
+        index="G1 Char", on="G2 Char", values="Count", sort_columns=True
+    ).sort("G1 Char")
+    g1_chars = matrix["G1 Char"].to_list()
+    g2_chars = matrix.columns[1:]
+    counts = matrix.select(g2_chars).fill_null(0).to_numpy()
+    shares = counts / counts.sum(axis=1, keepdims=True) * 100
+    fig = go.Figure(
+        go.Heatmap(
+            x=g2_chars,
+            y=g1_chars,
+            z=counts,
+            customdata=shares.round(2),
+            colorscale="Blues",
+            colorbar={"title": "Sets"},
+            hovertemplate=(
+                "Game 1: %{y}<br>"
+                "Game 2: %{x}<br>"
+                "Sets: %{z}<br>"
+                "Share of Game 1 %{y}: %{customdata}%<br>"
+                "<extra></extra>"
+            ),
+        )
+    )
+    fig.update_layout(
+        title=title,
+        xaxis_title="Opponent Game 2 Character",
+        yaxis_title="Opponent Game 1 Character",
+        template="plotly_white",
+    )
+    return fig
+
+
+def make_set_outcome_bar(
+    summary_df: pl.DataFrame, counterpick_df: pl.DataFrame, title: str
+) -> go.Figure:
+    labels = ["Comeback After Losing G1", "Conversion After Winning G1"]
+    rates = [summary_df["Comeback Rate"][0], summary_df["Conversion Rate"][0]]
+    counts = [summary_df["Lost G1"][0], summary_df["Won G1"][0]]
+    labels += [f"{choice} Won" for choice in counterpick_df["Stage_Choice"]]
+    rates += counterpick_df["Picker WinRate"].to_list()
+    counts += counterpick_df["Total_Matches"].to_list()
+    fig = go.Figure(
+        go.Bar(
+            x=labels,
+            y=rates,
+            customdata=counts,
+            hovertemplate=(
+                "%{x}<br>"
+                "Rate: %{y}%<br>"
+                "Out of: %{customdata}<br>"
+                "<extra></extra>"
+            ),
+        )
+    )
+    fig.update_layout(title=title, yaxis_title="Rate", template="plotly_white")
+    fig.update_yaxes(range=[0, 100])
+    fig.add_hline(y=50, line=dict(color="red", width=2, dash="dash"))
+    return fig
+
+
+def make_session_plot(
+    session_summary_df: pl.DataFrame, position_winrate_df: pl.DataFrame, title: str
+) -> go.Figure:
+    # left: set winrate by how far into a session the set was played,
+    # right: each session's ELO change against how many sets it lasted
+    fig = make_subplots(
+        rows=1,
+        cols=2,
+        subplot_titles=["Winrate by Set Number in Session", "ELO Change per Session"],
+    )
+    fig.add_trace(
+        go.Bar(
+            x=position_winrate_df["Session Position"],
+            y=position_winrate_df["WinRate"],
+            customdata=position_winrate_df[["Wins", "Total_Matches"]],
+            name="Winrate",
+            hovertemplate=(
+                "Set %{x} of the Session<br>"
+                "Winrate: %{y}%<br>"
+                "Sets Won: %{customdata[0]} of %{customdata[1]}<br>"
+                "<extra></extra>"
+            ),
+        ),
+        row=1,
+        col=1,
+    )
+    fig.add_hline(y=50, line=dict(color="red", width=2, dash="dash"), row=1, col=1)
+    fig.add_trace(
+        go.Scatter(
+            x=session_summary_df["Sets"],
+            y=session_summary_df["ELO Change"],
+            mode="markers",
+            name="Sessions",
+            customdata=session_summary_df.select(
+                pl.col("Start").dt.strftime("%Y-%m-%d %H:%M"), "WinRate"
+            ),
+            hovertemplate=(
+                "Session Starting: %{customdata[0]}<br>"
+                "Sets: %{x}<br>"
+                "ELO Change: %{y}<br>"
+                "Winrate: %{customdata[1]}%<br>"
+                "<extra></extra>"
+            ),
+        ),
+        row=1,
+        col=2,
+    )
+    fig.update_xaxes(title_text="Set Number in Session", row=1, col=1)
+    fig.update_yaxes(title_text="Winrate", range=[0, 100], row=1, col=1)
+    fig.update_xaxes(title_text="Sets in Session", row=1, col=2)
+    fig.update_yaxes(title_text="ELO Change", row=1, col=2)
+    fig.update_layout(title=title, template="plotly_white", showlegend=False)
+    return fig
+
+
+def make_recency_bar(recency_df: pl.DataFrame, title: str, x_label: str) -> go.Figure:
+    # all-time winrate next to the recency weighted one, hover shows how many games'
+    # worth of weight is behind the weighted number
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                name="All Time",
+                x=recency_df["Value"],
+                y=recency_df["WinRate"],
+                customdata=recency_df["Total_Matches"],
+                hovertemplate=(
+                    "%{x}<br>"
+                    "All Time Winrate: %{y}%<br>"
+                    "Games: %{customdata}<br>"
+                    "<extra></extra>"
+                ),
+            ),
+            go.Bar(
+                name="Recency Weighted",
+                x=recency_df["Value"],
+                y=recency_df["Weighted_WinRate"],
+                customdata=recency_df["Weighted_Matches"],
+                hovertemplate=(
+                    "%{x}<br>"
+                    "Weighted Winrate: %{y}%<br>"
+                    "Effective Games: %{customdata}<br>"
+                    "<extra></extra>"
+                ),
+            ),
+        ]
+    )
+    fig.update_layout(
+        barmode="group",
+        title=title,
+        xaxis_title=x_label,
+        yaxis_title="Winrate",
+        template="plotly_white",
+    )
+    fig.update_yaxes(range=[0, 100])
+    fig.add_hline(y=50, line=dict(color="red", width=2, dash="dash"))
+    return fig
+
+
+def make_comparison_bars(
+    comparison_df: pl.DataFrame, labels: tuple[str, str], title: str, x_label: str
+) -> go.Figure:
+    # each side's winrate next to each other on top, A minus B underneath, with the
+    # z-test's significance markers over the pairs and on the difference bars
+    label_a, label_b = labels
+    fig = make_subplots(
+        rows=2,
+        cols=1,
+        shared_xaxes=True,
+        row_heights=[0.6, 0.4],
+        vertical_spacing=0.08,
+        subplot_titles=["Winrate", f"{label_a} minus {label_b}"],
+    )
+    for side, label in (("A", label_a), ("B", label_b)):
+        fig.add_trace(
+            go.Bar(
+                name=label,
+                x=comparison_df["Value"],
+                y=comparison_df[f"WinRate_{side}"],
+                customdata=comparison_df[[f"Wins_{side}", f"Games_{side}"]],
+                hovertemplate=(
+                    f"{label}<br>"
+                    "%{x}<br>"
+                    "Winrate: %{y:.2f}%<br>"
+                    "Games Won: %{customdata[0]} of %{customdata[1]}<br>"
+                    "<extra></extra>"
+                ),
+                offsetgroup=side,
+            ),
+            row=1,
+            col=1,
+        )
+    fig.add_trace(
+        go.Scatter(
+            x=comparison_df["Value"],
+            y=comparison_df.select(
+                pl.max_horizontal("WinRate_A", "WinRate_B") + 5
+            ).to_series(),
+            text=comparison_df["Significance"],
+            mode="text",
+            showlegend=False,
+            hoverinfo="skip",
+        ),
+        row=1,
+        col=1,
+    )
+    fig.add_trace(
+        go.Bar(
+            name="Difference",
+            x=comparison_df["Value"],
+            y=comparison_df["Difference"],
+            marker_color=[
+                "green" if difference > 0 else "red"
+                for difference in comparison_df["Difference"].fill_null(0)
+            ],
+            text=comparison_df["Significance"],
+            textposition="outside",
+            customdata=hover_customdata(comparison_df, ["P_Value"]),
+            hovertemplate=(
+                "%{x}<br>"
+                "Difference: %{y:+.2f} points<br>"
+                "p = %{customdata.P_Value:.3f}<br>"
+                "<extra></extra>"
+            ),
+            hovertemplatefallback="N/A",
+            showlegend=False,
+        ),
+        row=2,
+        col=1,
+    )
+    fig.update_layout(barmode="group", title=title, template="plotly_white")
+    fig.add_annotation(
+        text="* p < 0.05, ** p < 0.01, *** p < 0.001",
+        xref="paper",
+        yref="paper",
+        x=1,
+        y=-0.12,
+        showarrow=False,
+    )
+    fig.update_yaxes(title_text="Winrate", range=[0, 110], row=1, col=1)
+    fig.update_yaxes(title_text="Points", row=2, col=1)
+    fig.update_xaxes(title_text=x_label, row=2, col=1)
+    fig.add_hline(y=50, line=dict(color="red", width=2, dash="dash"), row=1, col=1)
+    fig.add_hline(y=0, line=dict(color="black", width=1), row=2, col=1)
+    return fig
+
+
+def make_elo_attribution_bar(
+    attribution_df: pl.DataFrame, title: str, x_label: str
+) -> go.Figure:
+    # net ELO won or lost in each group's games, most gained first
+    fig = go.Figure(
+        go.Bar(
+            x=attribution_df["Value"],
+            y=attribution_df["Net ELO"],
+            marker_color=[
+                "green" if net > 0 else "red" for net in attribution_df["Net ELO"]
+            ],
+            customdata=attribution_df[["Games", "ELO per Game"]],
+            hovertemplate=(
+                "%{x}<br>"
+                "Net ELO: %{y:+.1f}<br>"
+                "Games: %{customdata[0]}<br>"
+                "ELO per Game: %{customdata[1]:+.2f}<br>"
+                "<extra></extra>"
+            ),
+        )
+    )
+    fig.update_layout(
+        title=title,
+        xaxis_title=x_label,
+        yaxis_title="Net ELO",
+        template="plotly_white",
+    )
+    fig.add_hline(y=0, line=dict(color="black", width=1))
+    return fig
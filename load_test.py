@@ -0,0 +1,273 @@
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# the controls whose callbacks get driven by default, each request picks the next of
+# the control's options from the layout, the way a user clicking through them would
+default_targets = [
+    "character-filter.value",
+    "elo-line-filter.value",
+    "character-set-game-filter.value",
+    "stage-stat-selector.value",
+]
+UPDATE_PATH = "/_dash-update-component"
+
+
+class FlaskClientTransport:
+    # drives app.server in this process, one Flask test client per thread
+    def __init__(self):
+        import main
+
+        self.server = main.app.server
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, "client"):
+            self._local.client = self.server.test_client()
+        return self._local.client
+
+    def request(self, path: str, body: dict | None = None) -> tuple[int, bytes]:
+        if body is None:
+            response = self._client().get(path)
+        else:
+            response = self._client().post(path, json=body)
+        return response.status_code, response.data
+
+
+class HTTPTransport:
+    # drives a server that's already running, e.g. python main.py
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+
+    def request(self, path: str, body: dict | None = None) -> tuple[int, bytes]:
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(
+            self.url + path, data=data, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def wait_until_ready(transport, timeout: float) -> int:
+    # returns the dataset version the server has loaded
+    deadline = time.monotonic() + timeout
+    while True:
+        status, body = transport.request("/readyz")
+        if status == 200:
+            return json.loads(body)["version"]
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Server was not ready after {timeout}s: {body!r}")
+        time.sleep(0.2)
+
+
+def _layout_props(component, props: dict):
+    # every component's props in the layout, keyed by component id
+    if isinstance(component, list):
+        for child in component:
+            _layout_props(child, props)
+    elif isinstance(component, dict) and "props" in component:
+        if "id" in component["props"]:
+            props[component["props"]["id"]] = component["props"]
+        for value in component["props"].values():
+            _layout_props(value, props)
+
+
+def _option_values(options) -> list:
+    if isinstance(options, dict):
+        return list(options)
+    return [
+        option["value"] if isinstance(option, dict) else option for option in options
+    ]
+
+
+def _split_property(name: str) -> dict:
+    component_id, property_name = name.rsplit(".", 1)
+    return {"id": component_id, "property": property_name}
+
+
+def build_payloads(transport, targets: list[str], dataset_version: int) -> dict:
+    # one list of request bodies per target, built from the app's own layout and
+    # callback dependencies so they match what the browser sends
+    _, layout = transport.request("/_dash-layout")
+    _, dependencies = transport.request("/_dash-dependencies")
+    props = {}
+    _layout_props(json.loads(layout), props)
+
+    def current_value(item):
+        if item["id"] == "dataset-version":
+            return dataset_version
+        return props.get(item["id"], {}).get(item["property"])
+
+    payloads = {}
+    for target in targets:
+        target_input = _split_property(target)
+        dependency = next(
+            (
+                dependency
+                for dependency in json.loads(dependencies)
+                if target_input in dependency["inputs"]
+            ),
+            None,
+        )
+        if dependency is None:
+            raise ValueError(f"No callback takes {target} as an input")
+        output = dependency["output"]
+        if output.startswith(".."):
+            outputs = [_split_property(name) for name in output[2:-2].split("...")]
+        else:
+            outputs = _split_property(output)
+
+        options = props.get(target_input["id"], {}).get("options")
+        values = _option_values(options) if options else [current_value(target_input)]
+        payloads[target] = []
+        for value in values:
+            payloads[target].append(
+                {
+                    "output": output,
+                    "outputs": outputs,
+                    "inputs": [
+                        {
+                            **item,
+                            "value": (
+                                value if item == target_input else current_value(item)
+                            ),
+                        }
+                        for item in dependency["inputs"]
+                    ],
+                    "state": [
+                        {**item, "value": current_value(item)}
+                        for item in dependency["state"]
+                    ],
+                    "changedPropIds": [target],
+                }
+            )
+    return payloads
+
+
+def run_load(
+    transport, payloads: dict, concurrency: int, requests_per_target: int
+) -> tuple[dict, float]:
+    # every target gets the same number of requests, interleaved across the workers
+    jobs = [
+        (target, body)
+        for round_bodies in zip(
+            *[
+                itertools.islice(itertools.cycle(bodies), requests_per_target)
+                for bodies in payloads.values()
+            ]
+        )
+        for target, body in zip(payloads, round_bodies)
+    ]
+
+    def send(job):
+        target, body = job
+        start = time.perf_counter()
+        status, _ = transport.request(UPDATE_PATH, body)
+        return target, status, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, jobs))
+    elapsed = time.perf_counter() - start
+
+    latencies = {target: [] for target in payloads}
+    errors = {target: 0 for target in payloads}
+    for target, status, latency in results:
+        latencies[target].append(latency)
+        # 204 is a callback raising PreventUpdate, which is still a served request
+        if status not in (200, 204):
+            errors[target] += 1
+    return {
+        target: {"latencies": np.array(latencies[target]), "errors": errors[target]}
+        for target in payloads
+    }, elapsed
+
+
+def print_report(results: dict, elapsed: float, concurrency: int):
+    total = sum(len(result["latencies"]) for result in results.values())
+    print(
+        f"{total} requests at concurrency {concurrency} in {elapsed:.2f}s "
+        f"({total / elapsed:.1f} req/s)"
+    )
+    print(
+        f"{'callback input':<36}{'requests':>9}{'errors':>8}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    everything = np.concatenate([result["latencies"] for result in results.values()])
+    rows = list(results.items()) + [
+        (
+            "all",
+            {
+                "latencies": everything,
+                "errors": sum(result["errors"] for result in results.values()),
+            },
+        )
+    ]
+    for target, result in rows:
+        p50, p95, p99 = np.percentile(result["latencies"], [50, 95, 99]) * 1000
+        # throughput per callback is its share of the requests over the whole run
+        print(
+            f"{target:<36}{len(result['latencies']):>9}{result['errors']:>8}"
+            f"{len(result['latencies']) / elapsed:>9.1f}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure callback throughput and latency under concurrent load"
+    )
+    parser.add_argument(
+        "--url",
+        help="a running server to load, e.g. http://127.0.0.1:8050 "
+        "(default: drive main.app.server in this process)",
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument(
+        "-n", "--requests", type=int, default=200, help="requests per callback input"
+    )
+    parser.add_argument(
+        "--target",
+        dest="targets",
+        action="append",
+        help="component.property whose callback to drive, may be repeated "
+        f"(default: {', '.join(default_targets)})",
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=1, help="untimed passes over every payload first"
+    )
+    parser.add_argument(
+        "--ready-timeout",
+        type=float,
+        default=120,
+        help="seconds to wait for the data to load",
+    )
+    args = parser.parse_args(argv)
+
+    transport = HTTPTransport(args.url) if args.url else FlaskClientTransport()
+    dataset_version = wait_until_ready(transport, args.ready_timeout)
+    payloads = build_payloads(
+        transport, args.targets or default_targets, dataset_version
+    )
+    for _ in range(args.warmup):
+        for bodies in payloads.values():
+            for body in bodies:
+                transport.request(UPDATE_PATH, body)
+
+    results, elapsed = run_load(transport, payloads, args.concurrency, args.requests)
+    print_report(results, elapsed, args.concurrency)
+    return 1 if any(result["errors"] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
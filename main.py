@@ -1,162 +1,423 @@
+import hashlib
+import os
+import pathlib
+import sys
+
+from compute_pool import ComputePool, Overloaded, configure_polars_threads
+
+# heavy callback work runs on a few pool threads, each with its own share of polars'
+# threads. This has to happen before anything imports polars
+COMPUTE_WORKERS = int(os.environ.get("RIVALS_COMPUTE_WORKERS", 4))
+configure_polars_threads(
+    COMPUTE_WORKERS,
+    int(os.environ.get("RIVALS_POLARS_THREADS_PER_TASK", 0)) or None,
+)
+
 import dash
-from dash import dcc, html, Input, Output
+from dash import dash_table, dcc, html, Input, Output, State, Patch, no_update, ctx
+from dash import set_props
+from dash import DiskcacheManager
+from dash.exceptions import PreventUpdate
+from flask import jsonify
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-import sys
 
 from graph_utils import *
-from game_data import stages, characters, character_icons
+from game_data import stages, characters, character_icons, stage_dimension_labels
 from df_utils import *
+from dataset import DatasetStore, boxplot_splits
+from storage import open_storage
+from crossfilter import apply_mask, describe_selections
+from set_log import set_log_columns
+from comparison import (
+    calculate_cohort_comparison,
+    cohort_choices,
+    comparison_dimensions,
+    comparison_modes,
+    tag_cohorts,
+    tag_players,
+)
+from api import create_api
 
+# how often open dashboards ask whether the spreadsheet has changed
+DATASET_POLL_MS = 5000
+LOADING_POLL_MS = 500
+# how long a figure the compute pool was too busy for waits before it's tried again
+COMPUTE_RETRY_MS = 3000
 
-setwise_df = parse_spreadsheet("rivals_spreadsheet.tsv")
-character_set_winrate_df = calculate_set_character_winrates(setwise_df)
-gamewise_df = calculate_gamewise_df(setwise_df)
-stage_winrate_df = calculate_stage_winrates(gamewise_df)
-# print(stage_winrate_df)
-character_game_winrate_df = calculate_game_character_winrates(gamewise_df)
-
-stage_bar = double_bar_plot_stages(
-    title="Stage Winrates",
-    stage_winrate_df=stage_winrate_df,
-    # x_axis=stage_winrate_df["Stage"],
-    # y1_axis=stage_winrate_df["Total_Matches"],
-    y1_name="Number of Matches",
-    y1_axis_label="Frequency of Stage",
-    # y2_axis=stage_winrate_df["WinRate"],
-    y2_name="Winrate",
-    y2_axis_label="Winrate",
-)
+# either a .tsv spreadsheet or a SQLite database made with storage.py
+DATA_PATH = os.environ.get("RIVALS_DATA", "rivals_spreadsheet.tsv")
+storage = open_storage(DATA_PATH, player=os.environ.get("RIVALS_PLAYER"))
+store = DatasetStore(storage)
+compute = ComputePool(max_workers=COMPUTE_WORKERS)
 
+# Analyses too slow for a request thread can run as background callbacks instead, by
+# passing background=True to app.callback. Each job gets its own process, reports
+# progress, is cancelled when its inputs change again, and its result is kept on
+# disk for a week, keyed by the inputs, the data and the code that computed it.
+# Nothing needs it yet: every callback so far reads figures or tables built with
+# the dataset, or finishes on the compute pool in well under a second, far less
+# than starting a job's process costs.
+BACKGROUND_CACHE_DIR = os.environ.get("RIVALS_CACHE_DIR", ".rivals_cache")
+BACKGROUND_EXPIRE_SECONDS = 7 * 24 * 60 * 60
+# Dash only hashes the callback's own source into the key, a fix anywhere else in
+# the analysis has to change it too
+BACKGROUND_CODE_VERSION = hashlib.sha1(
+    b"".join(
+        path.read_bytes() for path in sorted(pathlib.Path(__file__).parent.glob("*.py"))
+    )
+).hexdigest()
+
+
+class SpawningDiskcacheManager(DiskcacheManager):
+    # polars' thread pool doesn't survive a fork, a forked job hangs on its first
+    # query. Only the jobs are spawned, the rest of the process keeps its start method
+    def call_job_fn(self, key, job_fn, args, context):
+        process = multiprocess.get_context("spawn").Process(
+            target=job_fn,
+            args=(key, self._make_progress_key(key), args, context),
+        )
+        process.start()
+        return process.pid
+
+
+try:
+    import diskcache
+    import multiprocess
+
+    background_callback_manager = SpawningDiskcacheManager(
+        diskcache.Cache(BACKGROUND_CACHE_DIR),
+        cache_by=[
+            lambda: (os.path.abspath(DATA_PATH), storage.player),
+            lambda: BACKGROUND_CODE_VERSION,
+        ],
+        expire=BACKGROUND_EXPIRE_SECONDS,
+    )
+except ImportError:
+    background_callback_manager = None
+    print(
+        'Error: background callbacks need pip install "dash[diskcache]", '
+        "running them in the request thread instead",
+        file=sys.stderr,
+    )
+
+# the data loads in the background, the server takes connections straight away.
+# Background jobs import this file again in their own process to find their callback,
+# they load only what they need themselves
+if (
+    background_callback_manager is None
+    or multiprocess.current_process().name == "MainProcess"
+):
+    store.start_watching()
+
+
+app = dash.Dash(__name__, background_callback_manager=background_callback_manager)
+
+char_options = ["All Characters"] + characters
+
+
+@app.server.route("/healthz")
+def healthz():
+    # the process is up and serving, whether or not the data has loaded
+    return jsonify(status="ok")
 
-elo_scatter = scatterplot_with_icons(
-    independent=setwise_df["My ELO"],
-    dependent=setwise_df["Opponent ELO"],
-    title="My ELO vs. Opponent ELO",
-    x_title="My ELO",
-    y_title="Opponent ELO",
-    df=setwise_df,
-)
 
-stage_dimension_scatter = make_stage_scatter(
-    stage_winrate_df=stage_winrate_df,
-    title="Stage Width vs. Winrate",
-    x_title="Stage Width",
-    y_title="Winrate",
-    # dependent=stage_winrate_df["WinRate"],
-    independent_var="Stage_Width",
+@app.server.route("/readyz")
+def readyz():
+    body = {
+        "status": store.status,
+        "version": store.version,
+        "progress": store.progress,
+        "error": store.error,
+    }
+    return jsonify(body), 200 if store.ready else 503
+
+
+# JSON/Arrow tables for other tools under /api
+app.server.register_blueprint(create_api(store, compute))
+
+
+@app.server.route("/metrics/compute")
+def compute_metrics():
+    return jsonify(compute.metrics())
+
+
+def current_dataset():
+    # callbacks fired before the first load finishes leave the skeleton as it is
+    dataset = store.current
+    if dataset is None:
+        raise PreventUpdate
+    return dataset
+
+
+def load_status_message() -> str:
+    if store.status == "failed":
+        return f"Could not load data: {store.error}"
+    if not store.ready:
+        progress = store.progress
+        if progress["total"]:
+            return f"Loading data ({progress['done']}/{progress['total']})..."
+        return "Loading data..."
+    return ""
+
+
+@app.callback(
+    [
+        Output("dataset-version", "data"),
+        Output("load-status", "children"),
+        Output("dataset-poll", "interval"),
+    ],
+    [Input("dataset-poll", "n_intervals")],
+    [State("dataset-version", "data")],
 )
+def check_dataset_version(n_intervals, known_version):
+    # the common case is a no-op: nothing is recomputed or sent unless the data changed
+    if store.ready and store.version == known_version:
+        return no_update, no_update, no_update
+    if not store.ready:
+        # poll faster until the first load lands so the charts fill in promptly
+        return no_update, load_status_message(), LOADING_POLL_MS
+    return store.version, "", DATASET_POLL_MS
+
 
-# double bar graph for # matchups and winrate against each character
-
-matchup_bar = character_setwise_bar_plot(
-    title="Character Matchup Winrates",
-    x_axis=character_set_winrate_df["Main"],
-    y1_axis=character_set_winrate_df["Total_Matches"],
-    y1_name="Number of Matches",
-    y1_axis_label="Number of Matches",
-    y2_axis=character_set_winrate_df["WinRate"],
-    y2_name="Winrate",
-    y2_axis_label="Winrate",
+@app.callback(
+    [
+        Output("elo-scatter", "figure"),
+        Output("elo-histogram", "figure"),
+        Output("session-plot", "figure"),
+        Output("set-outcome-bar", "figure"),
+        Output("set-transition-heatmap", "figure"),
+    ],
+    [Input("dataset-version", "data")],
 )
+def update_static_figures(version):
+    figures = current_dataset().figures
+    return (
+        figures["elo-scatter"],
+        figures["elo-histogram"],
+        figures["session-plot"],
+        figures["set-outcome-bar"],
+        figures["set-transition-heatmap"],
+    )
 
-elo_plot = make_elo_line_plot(
-    x=setwise_df["Row Index"],
-    y=setwise_df["My ELO"],
-    title="ELO Over Time",
-    x_label="By Set",
-    y_label="ELO",
-    df=setwise_df,
+
+@app.callback(
+    Output("elo-boxplot", "figure"),
+    [Input("elo-boxplot-split", "value"), Input("dataset-version", "data")],
 )
+def update_elo_boxplot(split, version):
+    # every split is built with the dataset
+    return current_dataset().figures[f"elo-boxplot-{split}"]
+
 
-"""elo_histogram = make_elo_histogram(
-    x=setwise_df["ELO Diff"], x_label="ELO Difference", y_label="Count of Sets"
-)"""
-elo_histogram = make_elo_mirror_histogram(
-    setwise_df=setwise_df,
-    x_label="ELO Difference",
-    y_label="Counts",
-    title="ELO Histogram",
+@app.callback(
+    [
+        Output("cross-filter-selection", "data"),
+        Output("cross-filter-status", "children"),
+        Output("cross-filter-stage-choice", "value"),
+        Output("cross-filter-outcome", "value"),
+    ],
+    [
+        Input("character-bar", "clickData"),
+        Input("stage-bar-plot", "clickData"),
+        Input("cross-filter-stage-choice", "value"),
+        Input("cross-filter-outcome", "value"),
+        Input("cross-filter-clear", "n_clicks"),
+    ],
+    [State("cross-filter-selection", "data")],
 )
+def update_cross_filter(
+    character_click, stage_click, stage_choice, outcome, n_clicks, selections
+):
+    selections = dict(selections or {})
+    if ctx.triggered_id == "cross-filter-clear":
+        # the dropdowns are cleared too, rather than read back into the selection
+        return {}, describe_selections({}), None, None
+    if ctx.triggered_id == "character-bar" and character_click:
+        clicked = character_click["points"][0]["x"]
+        # "Multiple" isn't a character, so it can't be cross-filtered on
+        if clicked in characters:
+            # clicking the selected bar again clears it
+            selections["Char"] = None if selections.get("Char") == clicked else clicked
+    elif ctx.triggered_id == "stage-bar-plot" and stage_click:
+        clicked = stage_click["points"][0]["x"]
+        selections["Stage"] = None if selections.get("Stage") == clicked else clicked
+    selections["Stage_Choice"] = stage_choice
+    selections["Outcome"] = outcome
+    return selections, describe_selections(selections), no_update, no_update
 
-boxplot = go.Figure(
-    go.Box(
-        x=setwise_df["ELO Diff"],
-        boxpoints="all",
-        jitter=0.3,
-        pointpos=0,
-        marker=dict(color="green"),
-        name="ELO Diff",
-        customdata=setwise_df[
-            ["Main", "Win/Loss", "Breakdown", "My ELO", "Opponent ELO"]
-        ],
-        hovertemplate=(
-            "Opponent Main: %{customdata[0]}<br>"
-            "Opponent ELO: %{customdata[4]}<br>"
-            "My ELO: %{customdata[3]}<br>"
-            "Set Outcome: %{customdata[1]}<br>"
-            "Game Breakdown: %{customdata[2]}<br>"
-            "<extra></extra>"
-        ),
+
+def without(selections: dict, dimension: str) -> dict:
+    # a chart isn't filtered by its own dimension, so the other bars stay clickable
+    return {key: value for key, value in (selections or {}).items() if key != dimension}
+
+
+def retry_interval(figure_id: str) -> dcc.Interval:
+    # fires once each time computed() drops one of figure_id's updates, max_intervals
+    # is raised one past n_intervals to schedule it
+    return dcc.Interval(
+        id=f"{figure_id}-retry", interval=COMPUTE_RETRY_MS, max_intervals=0
     )
-)
 
-# Add layout details
-boxplot.update_layout(
-    title="Box-and-Whisker Plot of ELO Diff",
-    xaxis_title="ELO Diff",
-    template="plotly_white",
-)
 
+def retry_inputs(figure_id: str) -> list:
+    # every figure using computed() takes these last, after its own inputs
+    return [
+        Input(f"{figure_id}-retry", "n_intervals"),
+        State(f"{figure_id}-retry", "max_intervals"),
+    ]
 
-app = dash.Dash(__name__)
 
-char_options = ["All Characters"] + characters
+def retry_pending() -> bool:
+    # whether the callback's figure is showing computed()'s placeholder
+    retry = f"{ctx.outputs_list['id']}-retry"
+    return (ctx.states.get(f"{retry}.max_intervals") or 0) > (
+        ctx.inputs.get(f"{retry}.n_intervals") or 0
+    )
 
 
-@app.callback(Output("stage-bar-plot", "figure"), [Input("character-filter", "value")])
-def update_stage_bar_graph(selected_character):
-    if selected_character == "All Characters":
-        filtered_df = gamewise_df
-    else:
-        filtered_df = gamewise_df.filter(pl.col("Char") == selected_character)
+def computed(key: tuple, fn, *args):
+    # cache hits come straight back, anything else waits for a compute pool worker.
+    # When the pool is overloaded the figure gets a placeholder instead, and its retry
+    # interval fires once more to try again.
+    try:
+        return compute.cached(key, fn, *args)
+    except Overloaded as e:
+        print(
+            f"Error: dropped {key[0]} update, server is overloaded ({e})",
+            file=sys.stderr,
+        )
+        retry = f"{ctx.outputs_list['id']}-retry"
+        n_intervals = ctx.inputs.get(f"{retry}.n_intervals") or 0
+        set_props(retry, {"max_intervals": n_intervals + 1})
+        return make_empty_figure(
+            title="", message="The server is busy, trying again in a few seconds"
+        )
+
+
+def skeleton_is_shown(*skeleton_inputs: str) -> bool:
+    # whether the browser already has this figure's layout, so a Patch is enough. The
+    # first call after the page loads and any new dataset send a whole figure, and so
+    # does any input in skeleton_inputs. Inputs can fire together, e.g. the cross
+    # filter and the dataset version on page load, so every triggered one is checked.
+    # computed()'s placeholder has no skeleton either, until a whole figure replaces it.
+    triggered = set(ctx.triggered_prop_ids.values())
+    retry = f"{ctx.outputs_list['id']}-retry"
+    return (
+        bool(triggered)
+        and triggered.isdisjoint({"dataset-version", retry, *skeleton_inputs})
+        and not retry_pending()
+    )
 
-    stage_winrate_df = calculate_stage_winrates(filtered_df)
 
-    figure = double_bar_plot_stages(
-        title=f"Stage Winrates Against {selected_character}",
+def stage_bar_figure(dataset, mask, character, partial: bool) -> go.Figure | Patch:
+    stage_winrate_df = calculate_stage_winrates(apply_mask(dataset.gamewise_df, mask))
+    title = f"Stage Winrates Against {character or 'All Characters'}"
+    if partial:
+        return patch_double_bar_plot_stages(title, stage_winrate_df)
+    return double_bar_plot_stages(
+        title=title,
         stage_winrate_df=stage_winrate_df,
         y1_name="Number of Matches",
         y1_axis_label="Frequency of Stage",
         y2_name="Winrate",
         y2_axis_label="Winrate",
     )
-    return figure
 
 
-@app.callback(Output("elo-line-plot", "figure"), [Input("elo-line-filter", "value")])
-def update_elo_line(date_vs_set):
-    if date_vs_set == "By Set":
-        elo_plot = make_elo_line_plot(
-            x=setwise_df["Row Index"],
-            y=setwise_df["My ELO"],
-            title="ELO Over Time",
-            x_label="Set Number",
-            y_label="ELO",
-            df=setwise_df,
-        )
-    else:
-        elo_plot = elo_double_line_plot(
-            setwise_df=setwise_df, title="ELO Over Time", x_label="Date", y_label="ELO"
-        )
-    return elo_plot
+@app.callback(
+    Output("stage-bar-plot", "figure"),
+    [
+        Input("character-filter", "value"),
+        Input("cross-filter-selection", "data"),
+        Input("dataset-version", "data"),
+        *retry_inputs("stage-bar-plot"),
+    ],
+)
+def update_stage_bar_graph(
+    selected_character, selections, version, n_retries, max_retries
+):
+    dataset = current_dataset()
+    selections = without(selections, "Stage")
+    if selected_character != "All Characters":
+        selections["Char"] = selected_character
+    mask = dataset.crossfilter.game_mask(selections)
+    partial = skeleton_is_shown()
+
+    if mask is None:
+        # nothing selected, the unfiltered chart was built with the dataset
+        figure = dataset.figures["stage-bar-plot"]
+        return patch_from_figure(figure) if partial else figure
+    return computed(
+        (
+            "stage-bar-plot",
+            dataset.version,
+            partial,
+            tuple(sorted(selections.items())),
+        ),
+        stage_bar_figure,
+        dataset,
+        mask,
+        selections.get("Char"),
+        partial,
+    )
 
 
 @app.callback(
-    Output("character-bar", "figure"), [Input("character-set-game-filter", "value")]
+    Output("elo-line-plot", "figure"),
+    [
+        Input("elo-line-filter", "value"),
+        Input("dataset-version", "data"),
+        *retry_inputs("elo-line-plot"),
+    ],
 )
-def update_character_bars(character_set_game):
+def update_elo_line(date_vs_set, version, n_retries, max_retries):
+    dataset = current_dataset()
+    setwise_df = dataset.setwise_df
+    if date_vs_set == "By Set":
+        # built with the dataset
+        return dataset.figures["elo-line-plot"]
+    return computed(
+        ("elo-line-by-date", dataset.version),
+        elo_double_line_plot,
+        setwise_df,
+        "ELO Over Time",
+        "Date",
+        "ELO",
+    )
+
+
+def character_bar_figure(
+    dataset, character_set_game, selections, partial: bool
+) -> go.Figure | Patch:
+    character_set_winrate_df = dataset.character_set_winrate_df
+    character_game_winrate_df = dataset.character_game_winrate_df
+    set_mask = dataset.crossfilter.set_mask(selections)
+    if set_mask is not None:
+        character_set_winrate_df = calculate_set_character_winrates(
+            apply_mask(dataset.setwise_df, set_mask)
+        )
+    game_mask = dataset.crossfilter.game_mask(selections)
+    if game_mask is not None:
+        character_game_winrate_df = calculate_game_character_winrates(
+            apply_mask(dataset.gamewise_df, game_mask)
+        )
+    if character_set_game == "By Set" and partial:
+        return patch_character_setwise_bar_plot(
+            title="Character Matchup Winrates By Set",
+            x_axis=character_set_winrate_df["Main"],
+            y1_axis=character_set_winrate_df["Total_Matches"],
+            y2_axis=character_set_winrate_df["WinRate"],
+        )
+    if partial:
+        return patch_character_gamewise_bar_plot(
+            title="Character Matchup Winrates By Game",
+            x_axis=character_game_winrate_df["Char"],
+            y1_axis=character_game_winrate_df["Total_Matches"],
+            y2_axis=character_game_winrate_df["WinRate"],
+            df=character_game_winrate_df,
+        )
     if character_set_game == "By Set":
         matchup_bar = character_setwise_bar_plot(
             title="Character Matchup Winrates By Set",
@@ -186,23 +447,251 @@ def update_character_bars(character_set_game):
 
 
 @app.callback(
-    Output("stage-dimension-scatter", "figure"), [Input("stage-stat-selector", "value")]
+    Output("character-bar", "figure"),
+    [
+        Input("character-set-game-filter", "value"),
+        Input("cross-filter-selection", "data"),
+        Input("dataset-version", "data"),
+        *retry_inputs("character-bar"),
+    ],
 )
-def update_stage_dimension_scatter(stage_dimension):
-    stage_dimension_scatter = make_stage_scatter(
-        stage_winrate_df=stage_winrate_df,
-        title=f"Stage {stage_dimension} vs. Winrate",
-        x_title=f"Stage {stage_dimension}",
-        y_title="Winrate",
-        # dependent=stage_winrate_df["WinRate"],
-        independent_var=stage_dimension,
+def update_character_bars(
+    character_set_game, selections, version, n_retries, max_retries
+):
+    dataset = current_dataset()
+    selections = without(selections, "Char")
+    # By Set and By Game have different hover text, so switching sends a whole figure
+    partial = skeleton_is_shown("character-set-game-filter")
+    if (
+        character_set_game == "By Set"
+        and dataset.crossfilter.set_mask(selections) is None
+    ):
+        # built with the dataset
+        figure = dataset.figures["character-bar"]
+        return patch_from_figure(figure) if partial else figure
+    return computed(
+        (
+            "character-bar",
+            dataset.version,
+            character_set_game,
+            partial,
+            tuple(sorted(selections.items())),
+        ),
+        character_bar_figure,
+        dataset,
+        character_set_game,
+        selections,
+        partial,
+    )
+
+
+@app.callback(
+    Output("elo-attribution-plot", "figure"),
+    [Input("elo-attribution-dimension", "value"), Input("dataset-version", "data")],
+)
+def update_elo_attribution(dimension, version):
+    # every dimension's figure is built with the dataset
+    return current_dataset().figures[f"elo-attribution-{dimension}"]
+
+
+@app.callback(
+    [
+        Output("elo-continuity-status", "children"),
+        Output("elo-continuity-table", "data"),
+    ],
+    Input("dataset-version", "data"),
+)
+def update_elo_continuity(version):
+    dataset = current_dataset()
+    continuity_df = dataset.elo_attribution["continuity"]
+    if continuity_df.is_empty():
+        return "Every set starts from the ELO the set before it ended on.", []
+    status = (
+        f"{len(continuity_df)} of {len(dataset.setwise_df) - 1} sets don't start from "
+        "the ELO the set before them ended on, so a set may be missing or mistyped."
+    )
+    return status, continuity_df.with_columns(pl.col("Date").cast(pl.String)).to_dicts()
+
+
+@app.callback(
+    Output("matchup-trend-plot", "figure"),
+    [
+        Input("matchup-trend-dimension", "value"),
+        Input("matchup-trend-window", "value"),
+        Input("dataset-version", "data"),
+    ],
+)
+def update_matchup_trends(dimension, window, version):
+    # the time series is computed once per dataset version, this only slices it
+    timeseries_df = current_dataset().winrate_timeseries_df.filter(
+        (pl.col("Dimension") == dimension) & (pl.col("Window") == window)
+    )
+    return make_winrate_small_multiples(
+        timeseries_df=timeseries_df,
+        title=f"{window} Winrate by {dimension}",
+        y_label="Winrate",
+    )
+
+
+@app.callback(
+    Output("recent-form-plot", "figure"),
+    [
+        Input("recent-form-dimension", "value"),
+        Input("recent-form-half-life", "value"),
+        Input("dataset-version", "data"),
+    ],
+)
+def update_recent_form(dimension, half_life, version):
+    # only rescales per-day sums made when the dataset loaded, cheap enough to follow
+    # the slider while it's dragged
+    recency_df = current_dataset().recency.winrates(dimension, half_life)
+    description = f"{half_life} Day Half-Life" if half_life else "No Decay"
+    return make_recency_bar(
+        recency_df=recency_df,
+        title=f"Recency Weighted Winrate by {dimension} ({description})",
+        x_label=dimension,
+    )
+
+
+@app.callback(
+    Output("counterpick-table", "data"),
+    [
+        Input("counterpick-character", "value"),
+        Input("counterpick-context", "value"),
+        Input("dataset-version", "data"),
+    ],
+)
+def update_counterpick_table(character, context, version):
+    # every ranking is made when the dataset loads, this is just a dict lookup
+    return current_dataset().counterpick_rankings.get((character, context), [])
+
+
+@app.callback(
+    Output("stage-dimension-scatter", "figure"),
+    [Input("stage-stat-selector", "value"), Input("dataset-version", "data")],
+)
+def update_stage_dimension_scatter(stage_dimension, version):
+    # every dimension's figure is built with the dataset
+    return current_dataset().figures[f"stage-dimension-scatter-{stage_dimension}"]
+
+
+@app.callback(
+    [
+        Output("compare-a", "options"),
+        Output("compare-a", "value"),
+        Output("compare-b", "options"),
+        Output("compare-b", "value"),
+    ],
+    [Input("compare-mode", "value"), Input("dataset-version", "data")],
+    [State("compare-a", "value"), State("compare-b", "value")],
+)
+def update_compare_choices(mode, version, a, b):
+    dataset = current_dataset()
+    if mode == "Players":
+        # the dashboard's own player first
+        choices = sorted(
+            store.storage.players(), key=lambda player: player != store.storage.player
+        )
+    else:
+        choices = cohort_choices(dataset.comparison_games, comparison_modes[mode])
+    if ctx.triggered_id == "compare-mode" or a not in choices or b not in choices:
+        # the newest two months, the two most played characters or the first two players
+        a, b = (choices + [None, None])[:2]
+    return choices, a, choices, b
+
+
+def comparison_figure(dataset, mode, a, b, dimension) -> go.Figure:
+    if mode == "Players":
+        tagged_df = tag_players(
+            store.storage.load_games(player=a), store.storage.load_games(player=b)
+        )
+    else:
+        tagged_df = tag_cohorts(dataset.comparison_games, comparison_modes[mode], a, b)
+    return make_comparison_bars(
+        comparison_df=calculate_cohort_comparison(
+            tagged_df, comparison_dimensions[dimension]
+        ),
+        labels=(a, b),
+        title=f"{a} vs. {b} Winrate by {dimension}",
+        x_label=dimension,
+    )
+
+
+@app.callback(
+    Output("comparison-plot", "figure"),
+    [
+        Input("compare-mode", "value"),
+        Input("compare-a", "value"),
+        Input("compare-b", "value"),
+        Input("compare-dimension", "value"),
+        Input("dataset-version", "data"),
+        *retry_inputs("comparison-plot"),
+    ],
+)
+def update_comparison(mode, a, b, dimension, version, n_retries, max_retries):
+    dataset = current_dataset()
+    if a is None or b is None or a == b:
+        # nothing to compare until two different sides are picked
+        raise PreventUpdate
+    return computed(
+        ("comparison-plot", dataset.version, mode, a, b, dimension),
+        comparison_figure,
+        dataset,
+        mode,
+        a,
+        b,
+        dimension,
+    )
+
+
+@app.callback(
+    [
+        Output("set-log-table", "data"),
+        Output("set-log-table", "page_count"),
+    ],
+    [
+        Input("set-log-table", "page_current"),
+        Input("set-log-table", "page_size"),
+        Input("set-log-table", "sort_by"),
+        Input("set-log-table", "filter_query"),
+        Input("dataset-version", "data"),
+    ],
+)
+def update_set_log(page_current, page_size, sort_by, filter_query, version):
+    # sorting, filtering and paging all happen here, only the visible page is sent
+    return current_dataset().set_log.page(
+        page_current or 0, page_size, sort_by, filter_query
     )
-    return stage_dimension_scatter
 
 
 app.layout = html.Div(
     [
         html.H1("ELO Analysis Dashboard"),
+        # version 0 means nothing is loaded yet, the charts fill in once the poll sees data
+        dcc.Store(id="dataset-version", data=0),
+        dcc.Interval(id="dataset-poll", interval=LOADING_POLL_MS),
+        html.Div(id="load-status"),
+        dcc.Store(id="cross-filter-selection", data={}),
+        # click a bar in the character or stage charts to filter the other charts by it
+        html.Div(
+            children=[
+                dcc.Dropdown(
+                    id="cross-filter-stage-choice",
+                    options=["Picks/Bans", "My Counterpick", "Their Counterpick"],
+                    placeholder="Filter by stage choice",
+                    style={"width": "250px"},
+                ),
+                dcc.Dropdown(
+                    id="cross-filter-outcome",
+                    options={"W": "Wins", "L": "Losses"},
+                    placeholder="Filter by outcome",
+                    style={"width": "200px"},
+                ),
+                html.Button("Clear Filters", id="cross-filter-clear"),
+                html.Span(id="cross-filter-status"),
+            ],
+            style={"display": "flex", "gap": "10px", "align-items": "center"},
+        ),
         dcc.Tabs(
             id="tabs",
             value="tab-elo",
@@ -217,21 +706,25 @@ app.layout = html.Div(
                             options=["By Set", "By Date"],
                             value="By Set",
                         ),
-                        dcc.Graph(
-                            id="elo-line-plot",
-                            figure=elo_plot,
-                        ),
-                        dcc.Graph(id="elo-scatter", figure=elo_scatter),
+                        dcc.Graph(id="elo-line-plot"),
+                        retry_interval("elo-line-plot"),
+                        dcc.Graph(id="elo-scatter"),
                         html.Div(
                             children=[
                                 dcc.Graph(
                                     id="elo-histogram",
-                                    figure=elo_histogram,
                                     style={"width": "48%", "display": "inline-block"},
                                 ),
-                                dcc.Graph(
-                                    id="elo-boxplot",
-                                    figure=boxplot,
+                                html.Div(
+                                    children=[
+                                        dcc.Dropdown(
+                                            id="elo-boxplot-split",
+                                            options=list(boxplot_splits),
+                                            value="All Sets",
+                                            clearable=False,
+                                        ),
+                                        dcc.Graph(id="elo-boxplot"),
+                                    ],
                                     style={"width": "48%", "display": "inline-block"},
                                 ),
                             ],
@@ -240,6 +733,33 @@ app.layout = html.Div(
                                 "justify-content": "space-between",
                             },
                         ),
+                        dcc.Graph(id="session-plot"),
+                        html.H2("ELO Attribution"),
+                        dcc.Dropdown(
+                            id="elo-attribution-dimension",
+                            options=list(elo_attribution_dimensions),
+                            value="Character",
+                            clearable=False,
+                            style={"width": "200px"},
+                        ),
+                        dcc.Graph(id="elo-attribution-plot"),
+                        html.P(id="elo-continuity-status"),
+                        dash_table.DataTable(
+                            id="elo-continuity-table",
+                            columns=[
+                                {"name": column, "id": column}
+                                for column in [
+                                    "Row Index",
+                                    "Date",
+                                    "Time",
+                                    "Previous Ending ELO",
+                                    "My ELO",
+                                    "Gap",
+                                ]
+                            ],
+                            page_size=10,
+                            style_table={"width": "700px"},
+                        ),
                     ],
                 ),
                 dcc.Tab(
@@ -251,13 +771,95 @@ app.layout = html.Div(
                             options=["By Set", "By Game"],
                             value="By Set",
                         ),
-                        dcc.Graph(id="character-bar", figure=matchup_bar),
+                        dcc.Graph(id="character-bar"),
+                        retry_interval("character-bar"),
+                        html.H2("Matchup Trends"),
+                        html.Div(
+                            children=[
+                                dcc.Dropdown(
+                                    id="matchup-trend-dimension",
+                                    options=["Character", "Stage"],
+                                    value="Character",
+                                    clearable=False,
+                                    style={"width": "200px"},
+                                ),
+                                dcc.Dropdown(
+                                    id="matchup-trend-window",
+                                    options=["Weekly", "Monthly"],
+                                    value="Weekly",
+                                    clearable=False,
+                                    style={"width": "200px"},
+                                ),
+                            ],
+                            style={"display": "flex", "gap": "10px"},
+                        ),
+                        dcc.Graph(id="matchup-trend-plot"),
+                        html.H2("Recent Form"),
+                        dcc.Dropdown(
+                            id="recent-form-dimension",
+                            options=["Character", "Stage"],
+                            value="Character",
+                            clearable=False,
+                            style={"width": "200px"},
+                        ),
+                        # half-life in days, 0 weighs every game the same
+                        dcc.Slider(
+                            id="recent-form-half-life",
+                            min=0,
+                            max=180,
+                            step=1,
+                            value=30,
+                            marks={
+                                0: "Off",
+                                7: "1 week",
+                                30: "1 month",
+                                90: "3 months",
+                                180: "6 months",
+                            },
+                            updatemode="drag",
+                        ),
+                        dcc.Graph(id="recent-form-plot"),
+                        html.H2("Set Analytics"),
+                        dcc.Graph(id="set-outcome-bar"),
+                        dcc.Graph(id="set-transition-heatmap"),
                     ],
                 ),
                 dcc.Tab(
                     label="Stage Data",
                     value="tab-stage",
                     children=[
+                        html.H2("Stage Recommendations"),
+                        html.Div(
+                            children=[
+                                dcc.Dropdown(
+                                    id="counterpick-character",
+                                    options=char_options,
+                                    value="All Characters",
+                                    clearable=False,
+                                    style={"width": "250px"},
+                                ),
+                                dcc.Dropdown(
+                                    id="counterpick-context",
+                                    options=list(counterpick_contexts),
+                                    value="My Counterpick",
+                                    clearable=False,
+                                    style={"width": "250px"},
+                                ),
+                            ],
+                            style={"display": "flex", "gap": "10px"},
+                        ),
+                        dash_table.DataTable(
+                            id="counterpick-table",
+                            columns=[
+                                {"name": "Rank", "id": "Rank"},
+                                {"name": "Stage", "id": "Stage"},
+                                {"name": "Expected Winrate %", "id": "Shrunk_WinRate"},
+                                {"name": "Observed Winrate %", "id": "WinRate"},
+                                {"name": "Wins", "id": "Wins"},
+                                {"name": "Games", "id": "Games"},
+                            ],
+                            style_table={"width": "700px"},
+                        ),
                         dcc.Dropdown(
                             id="character-filter",
                             options=[
@@ -266,20 +868,77 @@ app.layout = html.Div(
                             value="All Characters",
                             placeholder="Select a character",
                         ),
-                        dcc.Graph(id="stage-bar-plot", figure=stage_bar),
+                        dcc.Graph(id="stage-bar-plot"),
+                        retry_interval("stage-bar-plot"),
                         dcc.Dropdown(
                             id="stage-stat-selector",
-                            options={
-                                "Stage_Width": "Width",
-                                "Top_Blast": "Top Blastzone",
-                                "Side_Blast": "Side Blastzone",
-                                "Bot_Blast": "Bottom Blastzone",
-                            },
+                            options=stage_dimension_labels,
                             value="Stage_Width",
                             placeholder="Select a stage dimension",
                         ),
-                        dcc.Graph(
-                            id="stage-dimension-scatter", figure=stage_dimension_scatter
+                        dcc.Graph(id="stage-dimension-scatter"),
+                    ],
+                ),
+                dcc.Tab(
+                    label="Compare",
+                    value="tab-compare",
+                    children=[
+                        html.Div(
+                            children=[
+                                dcc.Dropdown(
+                                    id="compare-mode",
+                                    options=list(comparison_modes),
+                                    value="Months",
+                                    clearable=False,
+                                    style={"width": "150px"},
+                                ),
+                                dcc.Dropdown(
+                                    id="compare-a",
+                                    clearable=False,
+                                    style={"width": "200px"},
+                                ),
+                                html.Span("vs."),
+                                dcc.Dropdown(
+                                    id="compare-b",
+                                    clearable=False,
+                                    style={"width": "200px"},
+                                ),
+                                dcc.Dropdown(
+                                    id="compare-dimension",
+                                    options=list(comparison_dimensions),
+                                    value="Character",
+                                    clearable=False,
+                                    style={"width": "200px"},
+                                ),
+                            ],
+                            style={
+                                "display": "flex",
+                                "gap": "10px",
+                                "align-items": "center",
+                            },
+                        ),
+                        dcc.Graph(id="comparison-plot", style={"height": "700px"}),
+                        retry_interval("comparison-plot"),
+                    ],
+                ),
+                dcc.Tab(
+                    label="Set Log",
+                    value="tab-set-log",
+                    children=[
+                        dash_table.DataTable(
+                            id="set-log-table",
+                            columns=[
+                                {"name": column, "id": column}
+                                for column in set_log_columns
+                            ],
+                            page_current=0,
+                            page_size=25,
+                            page_action="custom",
+                            sort_action="custom",
+                            sort_mode="multi",
+                            sort_by=[],
+                            filter_action="custom",
+                            filter_query="",
                         ),
                     ],
                 ),
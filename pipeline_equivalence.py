@@ -0,0 +1,399 @@
+import argparse
+import contextlib
+import importlib
+import io
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from df_utils import (
+    parse_spreadsheet,
+    calculate_gamewise_df,
+    calculate_set_character_winrates,
+    calculate_stage_winrates,
+    calculate_game_character_winrates,
+)
+from game_data import characters, starter_stages, all_stages
+from storage import SQLiteStorage
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+BUNDLED_SPREADSHEET = PACKAGE_DIR / "rivals_spreadsheet.tsv"
+
+# A pipeline is a dict of steps in the same format as startup.run_graph's nodes,
+# name -> (function, [dependency names]), where "spreadsheet" is the path of the
+# spreadsheet being processed. Steps run one at a time in order so each one can be
+# timed on its own. A candidate only has to define the steps it replaces, the rest
+# are taken from the reference.
+reference_steps = {
+    "setwise_df": (parse_spreadsheet, ["spreadsheet"]),
+    "gamewise_df": (calculate_gamewise_df, ["setwise_df"]),
+    "character_set_winrate_df": (calculate_set_character_winrates, ["setwise_df"]),
+    "stage_winrate_df": (calculate_stage_winrates, ["gamewise_df"]),
+    "character_game_winrate_df": (calculate_game_character_winrates, ["gamewise_df"]),
+}
+
+
+def _import_into_sqlite(spreadsheet: str) -> SQLiteStorage:
+    storage = SQLiteStorage(str(Path(spreadsheet).with_suffix(".db")))
+    storage.import_spreadsheet(spreadsheet)
+    return storage
+
+
+# reading back through the database the dashboard can be pointed at
+sqlite_steps = {
+    "storage": (_import_into_sqlite, ["spreadsheet"]),
+    "setwise_df": (lambda storage: storage.load_sets(), ["storage"]),
+    "gamewise_df": (lambda storage: storage.load_games(), ["storage"]),
+}
+
+builtin_candidates = {"sqlite": sqlite_steps}
+
+spreadsheet_columns = [
+    "Date",
+    "Time",
+    "My ELO",
+    "My Char",
+    "Win/Loss",
+    "Breakdown",
+    "Ending ELO",
+    "Opponent Name",
+    "Opponent ELO",
+    "Opponent Char",
+    "G1 Stage",
+    "G1 Stock Diff",
+    "G2 Stage",
+    "G2 Stock Diff",
+    "G3 Stage",
+    "G3 Stock Diff",
+    "Notes",
+    "G2 char (if different)",
+    "G3 char (if different)",
+    "My G2 (if different)",
+    "My G3 (if different)",
+]
+
+
+def generate_spreadsheet(
+    filepath: str,
+    n_sets: int,
+    seed: int,
+    three_game_rate: float = 0.4,
+    switch_rate: float = 0.08,
+    invalid_rate: float = 0.02,
+    missing_elo_rate: float = 0.01,
+):
+    # a spreadsheet shaped like the real one, with 2-0 sets (null G3 columns), character
+    # switches ("Multiple" mains), rows with unknown characters or stages and rows
+    # missing an ELO, at the given rates
+    rng = np.random.default_rng(seed)
+    rows = []
+    elo = 900
+    day = date(2024, 12, 1)
+    for _ in range(n_sets):
+        day += timedelta(days=int(rng.random() < 0.2))
+        minutes = int(rng.integers(0, 24 * 60))
+        time_formats = [
+            None,
+            f"{minutes // 60}:{minutes % 60:02d}",
+            f"{(minutes // 60 - 1) % 12 + 1}:{minutes % 60:02d}:00 "
+            f"{'AM' if minutes < 720 else 'PM'}",
+        ]
+        opponent_elo = elo + int(rng.normal(0, 60))
+        opponent_chars = [str(rng.choice(characters))] * 3
+        for game in [1, 2]:
+            if rng.random() < switch_rate:
+                opponent_chars[game] = str(rng.choice(characters))
+
+        if rng.random() < three_game_rate:
+            breakdown = str(rng.choice(["OXO", "OXX", "XOO", "XOX"]))
+        else:
+            breakdown = str(rng.choice(["OO-", "XX-"]))
+        won = breakdown.count("O") == 2
+        games = breakdown.strip("-")
+        stage_names = [str(rng.choice(starter_stages))] + [
+            str(rng.choice(all_stages)) for _ in games[1:]
+        ]
+        stock_diffs = [
+            int(rng.integers(1, 4)) * (1 if result == "O" else -1) for result in games
+        ]
+        if rng.random() < invalid_rate:
+            if rng.random() < 0.5:
+                opponent_chars[0] = "Mario"
+            else:
+                stage_names[0] = "Final Destination"
+
+        ending_elo = elo + int(rng.integers(5, 20)) * (1 if won else -1)
+        row = {
+            "Date": f"{day.month}/{day.day}/{day.year}",
+            "Time": time_formats[int(rng.integers(0, 3))],
+            "My ELO": None if rng.random() < missing_elo_rate else str(elo),
+            "My Char": "Fleet",
+            "Win/Loss": "W" if won else "L",
+            "Breakdown": breakdown,
+            "Ending ELO": str(ending_elo),
+            "Opponent Name": f"Player{int(rng.integers(0, 200))}",
+            "Opponent ELO": str(opponent_elo),
+            "Opponent Char": opponent_chars[0],
+            "Notes": "synthetic" if rng.random() < 0.1 else None,
+        }
+        for game in range(3):
+            played = game < len(games)
+            row[f"G{game + 1} Stage"] = stage_names[game] if played else None
+            row[f"G{game + 1} Stock Diff"] = str(stock_diffs[game]) if played else None
+        for game in [1, 2]:
+            switched = game < len(games) and opponent_chars[game] != opponent_chars[0]
+            row[f"G{game + 1} char (if different)"] = (
+                opponent_chars[game] if switched else None
+            )
+        rows.append(row)
+        elo = ending_elo
+
+    pl.DataFrame(
+        [[row.get(column) for column in spreadsheet_columns] for row in rows],
+        schema={column: pl.String for column in spreadsheet_columns},
+        orient="row",
+    ).write_csv(filepath, separator="\t")
+
+
+def run_pipeline(
+    steps: dict[str, tuple[Callable, list[str]]], spreadsheet: str, quiet: bool = True
+) -> tuple[dict, dict]:
+    results = {"spreadsheet": spreadsheet}
+    timings = {}
+    # parse_spreadsheet reports every invalid row, which is expected here
+    with (
+        contextlib.redirect_stderr(io.StringIO()) if quiet else contextlib.nullcontext()
+    ):
+        pending = dict(steps)
+        while pending:
+            # candidate steps can be merged in anywhere, so run in dependency order
+            ready = [
+                name
+                for name, (_, dependencies) in pending.items()
+                if all(dependency in results for dependency in dependencies)
+            ]
+            if not ready:
+                raise ValueError(f"Steps {sorted(pending)} can never run")
+            for name in ready:
+                fn, dependencies = pending.pop(name)
+                args = [results[dependency] for dependency in dependencies]
+                start = time.perf_counter()
+                results[name] = fn(*args)
+                timings[name] = time.perf_counter() - start
+    del results["spreadsheet"]
+    return results, timings
+
+
+def compare_frames(
+    expected: pl.DataFrame,
+    actual: pl.DataFrame,
+    tolerance: float = 1e-6,
+    check_dtypes: bool = False,
+) -> str | None:
+    # None if the frames hold the same rows in any order, otherwise what differs
+    try:
+        assert_frame_equal(
+            expected,
+            actual,
+            check_row_order=False,
+            check_column_order=False,
+            check_dtypes=check_dtypes,
+            rtol=tolerance,
+            atol=tolerance,
+        )
+    except AssertionError as e:
+        return str(e).splitlines()[0]
+    return None
+
+
+def _best_run(steps: dict, spreadsheet: Path, workdir: Path, repeat: int, quiet: bool):
+    # every run gets a fresh copy, parse_spreadsheet rewrites the file it reads
+    best_results, best_timings = None, None
+    for run in range(repeat):
+        run_dir = workdir / f"run{run}"
+        run_dir.mkdir()
+        copy = run_dir / spreadsheet.name
+        shutil.copyfile(spreadsheet, copy)
+        results, timings = run_pipeline(steps, str(copy), quiet=quiet)
+        if best_timings is None or sum(timings.values()) < sum(best_timings.values()):
+            best_results, best_timings = results, timings
+        shutil.rmtree(run_dir)
+    return best_results, best_timings
+
+
+def check_case(
+    name: str,
+    spreadsheet: Path,
+    candidate_steps: dict,
+    repeat: int = 3,
+    tolerance: float = 1e-6,
+    check_dtypes: bool = False,
+    quiet: bool = True,
+    min_speedup: float | None = None,
+) -> bool:
+    # a case passes when every frame matches and, with min_speedup, the candidate's
+    # total time is at least min_speedup times faster than the reference's
+    steps = {**reference_steps, **candidate_steps}
+    with tempfile.TemporaryDirectory() as workdir:
+        reference_dir = Path(workdir) / "reference"
+        candidate_dir = Path(workdir) / "candidate"
+        reference_dir.mkdir()
+        candidate_dir.mkdir()
+        expected, reference_timings = _best_run(
+            reference_steps, spreadsheet, reference_dir, repeat, quiet
+        )
+        actual, candidate_timings = _best_run(
+            steps, spreadsheet, candidate_dir, repeat, quiet
+        )
+
+    print(f"\n{name} ({len(expected['setwise_df'])} sets)")
+    print(f"  {'step':<28}{'reference':>12}{'candidate':>12}{'speedup':>10}  result")
+    passed = True
+    for step in steps:
+        reference_time = reference_timings.get(step)
+        candidate_time = candidate_timings[step]
+        if step in expected:
+            difference = compare_frames(
+                expected[step], actual[step], tolerance, check_dtypes
+            )
+            result = "ok" if difference is None else f"MISMATCH: {difference}"
+            passed &= difference is None
+        else:
+            result = "candidate only"
+        reference_column = f"{reference_time:.4f}s" if reference_time else "-"
+        speedup = (
+            f"{reference_time / candidate_time:.2f}x"
+            if reference_time and candidate_time
+            else "-"
+        )
+        print(
+            f"  {step:<28}{reference_column:>12}{candidate_time:>11.4f}s{speedup:>10}  {result}"
+        )
+    total_reference = sum(reference_timings.values())
+    total_candidate = sum(candidate_timings.values())
+    total_speedup = total_reference / total_candidate
+    if min_speedup is not None and total_speedup < min_speedup:
+        result = f"TOO SLOW: below --min-speedup {min_speedup:.2f}x"
+        passed = False
+    elif total_speedup < 1:
+        result = "slower than the reference"
+    else:
+        result = ""
+    print(
+        f"  {'total':<28}{total_reference:>11.4f}s{total_candidate:>11.4f}s"
+        f"{total_speedup:>9.2f}x  {result}".rstrip()
+    )
+    return passed
+
+
+def load_candidate(spec: str) -> dict:
+    # a built-in candidate's name, or module:attribute naming a dict of steps
+    if spec in builtin_candidates:
+        return builtin_candidates[spec]
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(
+            f"Candidate '{spec}' should be one of {sorted(builtin_candidates)} or module:attribute"
+        )
+    steps = getattr(importlib.import_module(module_name), attribute)
+    unknown = [
+        dependency
+        for _, dependencies in steps.values()
+        for dependency in dependencies
+        if dependency not in reference_steps
+        and dependency not in steps
+        and dependency != "spreadsheet"
+    ]
+    if unknown:
+        raise ValueError(f"Candidate '{spec}' depends on unknown steps {unknown}")
+    return steps
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Check a candidate data pipeline produces the same frames as the current one"
+    )
+    parser.add_argument(
+        "candidate",
+        help=f"one of {sorted(builtin_candidates)}, or module:attribute naming a dict of steps",
+    )
+    parser.add_argument(
+        "--seeds", type=int, nargs="+", default=[0, 1, 2], help="synthetic sheet seeds"
+    )
+    parser.add_argument(
+        "--sets", type=int, default=500, help="sets per synthetic spreadsheet"
+    )
+    parser.add_argument(
+        "--large",
+        type=int,
+        default=20000,
+        help="sets in the large synthetic spreadsheet used for timing, 0 to skip",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs to take the best of"
+    )
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    parser.add_argument(
+        "--min-speedup",
+        type=float,
+        help="fail a case whose candidate total is slower than this many times the "
+        "reference's speed, e.g. 1.0 (default: timings are only reported)",
+    )
+    parser.add_argument(
+        "--check-dtypes", action="store_true", help="also require identical dtypes"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="show the pipelines' own error output"
+    )
+    args = parser.parse_args(argv)
+    candidate_steps = load_candidate(args.candidate)
+
+    with tempfile.TemporaryDirectory() as sheet_dir:
+        cases = []
+        for seed in args.seeds:
+            path = Path(sheet_dir) / f"synthetic_{seed}.tsv"
+            generate_spreadsheet(str(path), args.sets, seed)
+            cases.append((f"synthetic seed={seed}", path))
+        # no set reaches game 3, so the G3 columns are entirely null
+        path = Path(sheet_dir) / "two_game_sets.tsv"
+        generate_spreadsheet(str(path), args.sets, seed=100, three_game_rate=0)
+        cases.append(("synthetic 2-0 sets only", path))
+        if args.large:
+            path = Path(sheet_dir) / "large.tsv"
+            generate_spreadsheet(str(path), args.large, seed=200)
+            cases.append(("synthetic large", path))
+        if BUNDLED_SPREADSHEET.exists():
+            cases.append(("rivals_spreadsheet.tsv", BUNDLED_SPREADSHEET))
+
+        failures = [
+            name
+            for name, path in cases
+            if not check_case(
+                name,
+                path,
+                candidate_steps,
+                repeat=args.repeat,
+                tolerance=args.tolerance,
+                check_dtypes=args.check_dtypes,
+                quiet=not args.verbose,
+                min_speedup=args.min_speedup,
+            )
+        ]
+
+    if failures:
+        print(f"\n{len(failures)} of {len(cases)} cases failed: {', '.join(failures)}")
+        return 1
+    print(f"\nAll {len(cases)} cases match")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
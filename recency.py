@@ -0,0 +1,74 @@
+import numpy as np
+import polars as pl
+
+# dimensions the recency weighted winrates are split by, and the gamewise_df column each
+# one reads
+recency_dimensions = {"Character": "Char", "Stage": "Stage"}
+
+
+# Wins and games for every (value, age in days) pair are summed once when the dataset
+# loads, as a groups x ages matrix per dimension. An exponentially decayed winrate for
+# any half-life is then just those matrices times a vector of per-age weights, so moving
+# the half-life never goes back to the raw games.
+class RecencyIndex:
+    def __init__(self, gamewise_df: pl.DataFrame):
+        latest = gamewise_df["Date"].max()
+        aged_df = gamewise_df.select(
+            [
+                *recency_dimensions.values(),
+                (pl.lit(latest) - pl.col("Date")).dt.total_days().alias("Age"),
+                pl.col("Win").fill_null(False),
+            ]
+        )
+        self.ages = aged_df["Age"].unique().sort().to_numpy()
+        age_positions = np.searchsorted(self.ages, aged_df["Age"].to_numpy())
+
+        self.values: dict[str, list[str]] = {}
+        self.wins: dict[str, np.ndarray] = {}
+        self.games: dict[str, np.ndarray] = {}
+        for dimension, column in recency_dimensions.items():
+            values = aged_df[column].drop_nulls().unique().sort().to_list()
+            known = aged_df[column].is_not_null().to_numpy()
+            codes = (
+                aged_df[column]
+                .replace_strict(values, range(len(values)), default=-1)
+                .to_numpy()[known]
+            )
+            positions = age_positions[known]
+            self.values[dimension] = values
+            self.games[dimension] = np.zeros((len(values), len(self.ages)))
+            self.wins[dimension] = np.zeros((len(values), len(self.ages)))
+            np.add.at(self.games[dimension], (codes, positions), 1)
+            np.add.at(
+                self.wins[dimension],
+                (codes, positions),
+                aged_df["Win"].to_numpy()[known],
+            )
+
+    def weights(self, half_life_days: float | None) -> np.ndarray:
+        # a game half_life_days old counts half as much as one from the latest day
+        if not half_life_days:
+            return np.ones(len(self.ages))
+        return 0.5 ** (self.ages / half_life_days)
+
+    def winrates(self, dimension: str, half_life_days: float | None) -> pl.DataFrame:
+        weights = self.weights(half_life_days)
+        wins, games = self.wins[dimension], self.games[dimension]
+        weighted_wins = wins @ weights
+        weighted_games = games @ weights
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weighted_winrate = weighted_wins / weighted_games * 100
+        total_games = games.sum(axis=1)
+        return (
+            pl.DataFrame(
+                {
+                    "Value": self.values[dimension],
+                    "Total_Matches": total_games.astype(np.int64),
+                    "WinRate": (wins.sum(axis=1) / total_games * 100).round(2),
+                    "Weighted_Matches": weighted_games.round(2),
+                    "Weighted_WinRate": weighted_winrate.round(2),
+                }
+            )
+            .filter(pl.col("Total_Matches") > 0)
+            .sort("Value")
+        )
@@ -0,0 +1,231 @@
+import argparse
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from df_utils import (
+    parse_spreadsheet,
+    calculate_gamewise_df,
+    calculate_set_character_winrates,
+    calculate_stage_winrates,
+    calculate_game_character_winrates,
+    calculate_stage_regressions,
+    join_stage_metadata,
+)
+from game_data import character_icons, stage_dimension_labels, stage_dimensions
+from graph_utils import (
+    character_gamewise_bar_plot,
+    character_setwise_bar_plot,
+    double_bar_plot_stages,
+    elo_double_line_plot,
+    make_elo_line_plot,
+    make_elo_mirror_histogram,
+    make_elo_scatter,
+    make_precomputed_boxplot,
+    make_stage_scatter,
+)
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+# static assets are written once per output directory and shared by every player's report
+PLOTLY_JS = "plotly.min.js"
+ICON_DIR = "character_icons"
+
+
+def build_player_figures(
+    setwise_df, icon_urls: dict[str, str] | None = None
+) -> dict[str, go.Figure]:
+    gamewise_df = calculate_gamewise_df(setwise_df)
+    character_set_winrate_df = calculate_set_character_winrates(setwise_df)
+    stage_winrate_df = calculate_stage_winrates(gamewise_df)
+    character_game_winrate_df = calculate_game_character_winrates(gamewise_df)
+
+    figures = {
+        "elo-line-by-set": make_elo_line_plot(
+            x=setwise_df["Row Index"],
+            y=setwise_df["My ELO"],
+            title="ELO Over Time",
+            x_label="Set Number",
+            y_label="ELO",
+            df=setwise_df,
+        ),
+        "elo-line-by-date": elo_double_line_plot(
+            setwise_df=setwise_df, title="ELO Over Time", x_label="Date", y_label="ELO"
+        ),
+        "elo-scatter": make_elo_scatter(
+            setwise_df=setwise_df,
+            title="My ELO vs. Opponent ELO",
+            x_title="My ELO",
+            y_title="Opponent ELO",
+            icon_urls=icon_urls,
+        ),
+        "elo-histogram": make_elo_mirror_histogram(
+            setwise_df=setwise_df,
+            x_label="ELO Difference",
+            y_label="Counts",
+            title="ELO Histogram",
+        ),
+        "elo-boxplot": make_precomputed_boxplot(
+            setwise_df=setwise_df,
+            title="Box-and-Whisker Plot of ELO Diff",
+            x_label="ELO Diff",
+        ),
+        "character-bar-by-set": character_setwise_bar_plot(
+            title="Character Matchup Winrates By Set",
+            x_axis=character_set_winrate_df["Main"],
+            y1_axis=character_set_winrate_df["Total_Matches"],
+            y1_name="Number of Sets",
+            y1_axis_label="Number of Sets",
+            y2_axis=character_set_winrate_df["WinRate"],
+            y2_name="Winrate",
+            y2_axis_label="Winrate",
+        ),
+        "character-bar-by-game": character_gamewise_bar_plot(
+            title="Character Matchup Winrates By Game",
+            x_axis=character_game_winrate_df["Char"],
+            y1_axis=character_game_winrate_df["Total_Matches"],
+            y1_name="Number of Games",
+            y1_axis_label="Number of Games",
+            y2_axis=character_game_winrate_df["WinRate"],
+            y2_name="Winrate",
+            y2_axis_label="Winrate",
+            df=character_game_winrate_df,
+        ),
+        "stage-bar-plot": double_bar_plot_stages(
+            title="Stage Winrates",
+            stage_winrate_df=stage_winrate_df,
+            y1_name="Number of Matches",
+            y1_axis_label="Frequency of Stage",
+            y2_name="Winrate",
+            y2_axis_label="Winrate",
+        ),
+    }
+    stage_scatter_df = join_stage_metadata(stage_winrate_df)
+    stage_regressions = calculate_stage_regressions(stage_scatter_df)
+    for dimension in stage_dimensions:
+        label = stage_dimension_labels[dimension]
+        figures[f"stage-scatter-{dimension}"] = make_stage_scatter(
+            stage_scatter_df=stage_scatter_df,
+            regressions=stage_regressions,
+            title=f"Stage {label} vs. Winrate",
+            x_title=f"Stage {label}",
+            y_title="Winrate",
+            independent_var=dimension,
+        )
+    return figures
+
+
+def write_shared_assets(output_dir: Path):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / PLOTLY_JS).write_text(get_plotlyjs(), encoding="utf-8")
+    (output_dir / ICON_DIR).mkdir(exist_ok=True)
+    for icon_path in set(character_icons.values()):
+        shutil.copyfile(PACKAGE_DIR / icon_path, output_dir / icon_path)
+
+
+def render_html(player: str, figures: dict[str, go.Figure]) -> str:
+    divs = [
+        pio.to_html(figure, include_plotlyjs=False, full_html=False, div_id=name)
+        for name, figure in figures.items()
+    ]
+    return (
+        "<!DOCTYPE html>\n<html>\n<head>\n"
+        '<meta charset="utf-8">\n'
+        f"<title>{player} - Rivals Report</title>\n"
+        f'<script src="{PLOTLY_JS}"></script>\n'
+        "</head>\n<body>\n"
+        f"<h1>{player} - ELO Analysis Report</h1>\n"
+        + "\n".join(divs)
+        + "\n</body>\n</html>\n"
+    )
+
+
+def render_player_report(
+    spreadsheet: str, output_dir: str, formats: list[str]
+) -> tuple:
+    start = time.perf_counter()
+    player = Path(spreadsheet).stem
+    setwise_df = parse_spreadsheet(spreadsheet)
+    # icon urls are relative to the output directory, where the shared icons live
+    figures = build_player_figures(setwise_df, icon_urls=character_icons)
+
+    written = []
+    if "html" in formats:
+        html_path = Path(output_dir) / f"{player}.html"
+        html_path.write_text(render_html(player, figures), encoding="utf-8")
+        written.append(str(html_path))
+    if "json" in formats:
+        json_path = Path(output_dir) / f"{player}.json"
+        json_path.write_text(
+            pio.json.to_json_plotly(figures),
+            encoding="utf-8",
+        )
+        written.append(str(json_path))
+    return player, written, time.perf_counter() - start
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Render static dashboard reports without starting the Dash server"
+    )
+    parser.add_argument(
+        "spreadsheets", nargs="+", help="one spreadsheet (.tsv) per player"
+    )
+    parser.add_argument("-o", "--output-dir", default="reports")
+    parser.add_argument(
+        "-f",
+        "--format",
+        dest="formats",
+        action="append",
+        choices=["html", "json"],
+        help="output format, may be repeated (default: html)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of worker processes",
+    )
+    args = parser.parse_args(argv)
+    formats = args.formats or ["html"]
+    output_dir = Path(args.output_dir)
+
+    start = time.perf_counter()
+    write_shared_assets(output_dir)
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {
+            executor.submit(
+                render_player_report, spreadsheet, str(output_dir), formats
+            ): spreadsheet
+            for spreadsheet in args.spreadsheets
+        }
+        for future in as_completed(futures):
+            try:
+                player, written, elapsed = future.result()
+            except Exception as e:
+                failures += 1
+                print(
+                    f"Error: could not render report for {futures[future]}: {e}",
+                    file=sys.stderr,
+                )
+                continue
+            print(f"{player}: {', '.join(written)} ({elapsed:.2f}s)")
+
+    print(
+        f"Rendered {len(args.spreadsheets) - failures} report(s) in "
+        f"{time.perf_counter() - start:.2f}s"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import polars as pl
+
+
+# Every game result comes from the Breakdown string (e.g. "OXO", "XX-"), one letter per
+# game: O for a win, X for a loss and - for a game that wasn't played. The game results
+# are parsed once into list columns and every statistic below reads those columns.
+def _parse_breakdown(setwise_df: pl.DataFrame) -> pl.LazyFrame:
+    games = pl.col("Breakdown").str.strip_chars("-").str.split("")
+    return (
+        setwise_df.lazy()
+        .select(["Row Index", "Win/Loss", "Breakdown", "G1 Char", "G2 Char"])
+        .filter(pl.col("Breakdown").is_not_null())
+        .with_columns(
+            [
+                games.list.get(0, null_on_oob=True).alias("G1 Result"),
+                games.list.get(1, null_on_oob=True).alias("G2 Result"),
+                games.list.get(2, null_on_oob=True).alias("G3 Result"),
+            ]
+        )
+    )
+
+
+def _rate(condition: pl.Expr, of: pl.Expr) -> pl.Expr:
+    # percentage of the rows matching `of` that also match `condition`
+    return ((condition & of).sum() / of.sum() * 100).round(2)
+
+
+def calculate_set_analytics(setwise_df: pl.DataFrame) -> dict[str, pl.DataFrame]:
+    parsed = _parse_breakdown(setwise_df)
+
+    lost_g1 = pl.col("G1 Result") == "X"
+    won_g1 = pl.col("G1 Result") == "O"
+    won_set = pl.col("Win/Loss") == "W"
+    summary = parsed.select(
+        [
+            lost_g1.sum().alias("Lost G1"),
+            _rate(won_set, lost_g1).alias("Comeback Rate"),
+            won_g1.sum().alias("Won G1"),
+            _rate(won_set, won_g1).alias("Conversion Rate"),
+        ]
+    )
+
+    # the loser of each game picks the next stage, so the counterpicking side won
+    # whenever a game's result differs from the one before it
+    counterpicks = pl.concat(
+        [
+            parsed.select(
+                [
+                    pl.lit(game).alias("Game"),
+                    pl.when(pl.col(f"{previous} Result") == "X")
+                    .then(pl.lit("My Counterpick"))
+                    .otherwise(pl.lit("Their Counterpick"))
+                    .alias("Stage_Choice"),
+                    (pl.col(f"{game} Result") != pl.col(f"{previous} Result")).alias(
+                        "Picker Won"
+                    ),
+                ]
+            ).filter(pl.col("Picker Won").is_not_null())
+            for previous, game in [("G1", "G2"), ("G2", "G3")]
+        ]
+    )
+    counterpick = (
+        counterpicks.group_by("Stage_Choice")
+        .agg(
+            [
+                pl.col("Picker Won").sum().alias("Picker Wins"),
+                pl.col("Picker Won").count().alias("Total_Matches"),
+            ]
+        )
+        .with_columns(
+            (pl.col("Picker Wins") / pl.col("Total_Matches") * 100)
+            .round(2)
+            .alias("Picker WinRate")
+        )
+        .sort("Stage_Choice")
+    )
+
+    # opponent's game 1 character against their game 2 character, for sets that had
+    # a game 2
+    transitions = (
+        parsed.filter(pl.col("G2 Result").is_not_null())
+        .drop_nulls(["G1 Char", "G2 Char"])
+        .group_by(["G1 Char", "G2 Char"])
+        .agg(pl.len().alias("Count"))
+        .with_columns(
+            (pl.col("Count") / pl.col("Count").sum().over("G1 Char") * 100)
+            .round(2)
+            .alias("Share")
+        )
+        .sort(["G1 Char", "G2 Char"])
+    )
+
+    # collected together so the breakdown parsing is shared between the three queries
+    summary, counterpick, transitions = pl.collect_all(
+        [summary, counterpick, transitions]
+    )
+    return {
+        "summary": summary,
+        "counterpick": counterpick,
+        "transitions": transitions,
+    }
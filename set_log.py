@@ -0,0 +1,131 @@
+import re
+from functools import lru_cache
+
+import polars as pl
+
+# the setwise_df columns shown in the set log, in display order
+set_log_columns = [
+    "Row Index",
+    "Date",
+    "Time",
+    "My Char",
+    "My ELO",
+    "Ending ELO",
+    "Opponent ELO",
+    "ELO Diff",
+    "Main",
+    "Win/Loss",
+    "Breakdown",
+    "G1 Char",
+    "G1 Stage",
+    "G1 Stock Diff",
+    "G2 Char",
+    "G2 Stage",
+    "G2 Stock Diff",
+    "G3 Char",
+    "G3 Stage",
+    "G3 Stock Diff",
+]
+
+# one clause of a DataTable filter_query, e.g. {My ELO} >= 900 or {Main} icontains "kr".
+# Operators may carry an s (case sensitive) or i (case insensitive) prefix.
+filter_clause = re.compile(
+    r"\{(?P<column>[^}]+)\}\s*"
+    r"(?P<case>[si]?)(?P<operator>>=|<=|!=|=|<|>|contains|datestartswith|eq|ne|lt|le|gt|ge)"
+    r"\s*(?P<value>.*)"
+)
+operator_aliases = {"eq": "=", "ne": "!=", "lt": "<", "le": "<=", "gt": ">", "ge": ">="}
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+        return value[1:-1]
+    return value
+
+
+def parse_filter_query(filter_query: str, schema: pl.Schema) -> list[pl.Expr]:
+    # clauses on unknown columns or with values that don't fit the column are ignored,
+    # the same way the table would ignore them client side
+    expressions = []
+    for clause in filter_query.split(" && "):
+        match = filter_clause.fullmatch(clause.strip())
+        if match is None or match["column"] not in schema:
+            continue
+        column = pl.col(match["column"])
+        operator = operator_aliases.get(match["operator"], match["operator"])
+        value = _unquote(match["value"])
+
+        if operator in ("contains", "datestartswith"):
+            text = column.cast(pl.String)
+            if match["case"] == "i":
+                text, value = text.str.to_lowercase(), value.lower()
+            if operator == "contains":
+                expressions.append(text.str.contains(value, literal=True))
+            else:
+                expressions.append(text.str.starts_with(value))
+            continue
+
+        if schema[match["column"]].is_numeric():
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+        else:
+            column = column.cast(pl.String)
+            if match["case"] == "i":
+                column, value = column.str.to_lowercase(), value.lower()
+        expressions.append(
+            {
+                "=": column == value,
+                "!=": column != value,
+                "<": column < value,
+                "<=": column <= value,
+                ">": column > value,
+                ">=": column >= value,
+            }[operator]
+        )
+    return expressions
+
+
+# Serves the set log one page at a time. Each distinct sort and filter is computed once
+# over the whole log and cached, so turning pages only slices the cached view and
+# converts the rows on that page.
+class SetLog:
+    def __init__(self, setwise_df: pl.DataFrame, max_views: int = 64):
+        self.df = setwise_df.select(set_log_columns).with_columns(
+            pl.col("Date").cast(pl.String)
+        )
+        # bound to this instance, so the cache goes away with the dataset
+        self._view = lru_cache(maxsize=max_views)(self._build_view)
+
+    def _build_view(self, sort_key: tuple, filter_query: str) -> pl.DataFrame:
+        if filter_query:
+            expressions = parse_filter_query(filter_query, self.df.schema)
+            view = self._view(sort_key, "")
+            return view.filter(expressions) if expressions else view
+        if not sort_key:
+            return self.df
+        return self.df.sort(
+            [column for column, _ in sort_key],
+            descending=[direction == "desc" for _, direction in sort_key],
+            nulls_last=True,
+            maintain_order=True,
+        )
+
+    def page(
+        self,
+        page_current: int,
+        page_size: int,
+        sort_by: list[dict] | None = None,
+        filter_query: str | None = None,
+    ) -> tuple[list[dict], int]:
+        # returns the page's rows and the number of pages
+        sort_key = tuple(
+            (sort["column_id"], sort["direction"])
+            for sort in sort_by or []
+            if sort["column_id"] in self.df.columns
+        )
+        view = self._view(sort_key, filter_query or "")
+        page_count = max(1, -(-len(view) // page_size))
+        return view.slice(page_current * page_size, page_size).to_dicts(), page_count
@@ -0,0 +1,64 @@
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
+
+def _timed(fn: Callable, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+# Runs a dependency graph of builders, each node is name -> (function, [dependency names])
+# and its function is called with its dependencies' results in order. Every node starts
+# as soon as its dependencies finish, so the total time is bound by the slowest chain
+# instead of the sum of all the builders. on_progress(name, done, total) is called as
+# each node finishes.
+def run_graph(
+    nodes: dict[str, tuple[Callable, list[str]]],
+    max_workers: int | None = None,
+    executor_class=ThreadPoolExecutor,
+    label: str = "startup",
+    on_progress: Callable[[str, int, int], None] | None = None,
+) -> dict:
+    for name, (_, dependencies) in nodes.items():
+        unknown = [dependency for dependency in dependencies if dependency not in nodes]
+        if unknown:
+            raise ValueError(f"Node '{name}' depends on unknown nodes {unknown}")
+
+    start = time.perf_counter()
+    results = {}
+    timings = {}
+    pending = dict(nodes)
+    running = {}
+    with executor_class(max_workers=max_workers) as executor:
+        while pending or running:
+            for name, (fn, dependencies) in list(pending.items()):
+                if all(dependency in results for dependency in dependencies):
+                    args = [results[dependency] for dependency in dependencies]
+                    running[executor.submit(_timed, fn, *args)] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"Dependency cycle between nodes {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name], timings[name] = future.result()
+                except Exception:
+                    # let the already running nodes finish, but don't start any more
+                    pending.clear()
+                    print(f"{label}: {name} failed", file=sys.stderr)
+                    raise
+                print(f"{label}: {name} took {timings[name]:.3f}s", file=sys.stderr)
+                if on_progress is not None:
+                    on_progress(name, len(results), len(nodes))
+
+    print(
+        f"{label}: built {len(nodes)} nodes in {time.perf_counter() - start:.3f}s "
+        f"({sum(timings.values()):.3f}s if run one after another)",
+        file=sys.stderr,
+    )
+    return results
@@ -0,0 +1,436 @@
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+
+import polars as pl
+
+from df_utils import parse_spreadsheet, calculate_gamewise_df
+
+# columns of setwise_df that get stored, with the sqlite and polars types they round trip through
+set_columns = {
+    "Row Index": ("INTEGER", pl.UInt32),
+    "Date": ("TEXT", pl.Date),
+    "Time": ("TEXT", pl.String),
+    "My ELO": ("INTEGER", pl.Int16),
+    "Ending ELO": ("INTEGER", pl.Int16),
+    "My Char": ("TEXT", pl.String),
+    "Win/Loss": ("TEXT", pl.String),
+    "Breakdown": ("TEXT", pl.String),
+    "Opponent ELO": ("INTEGER", pl.Int16),
+    "G1 Char": ("TEXT", pl.String),
+    "G1 Stage": ("TEXT", pl.String),
+    "G1 Stock Diff": ("INTEGER", pl.Int8),
+    "G2 Stage": ("TEXT", pl.String),
+    "G2 Stock Diff": ("INTEGER", pl.Int8),
+    "G3 Stage": ("TEXT", pl.String),
+    "G3 Stock Diff": ("INTEGER", pl.Int8),
+    "G2 Char": ("TEXT", pl.String),
+    "G3 Char": ("TEXT", pl.String),
+    "Main": ("TEXT", pl.String),
+    "G1 Stage_Choice": ("TEXT", pl.String),
+    "G2 Stage_Choice": ("TEXT", pl.String),
+    "G3 Stage_Choice": ("TEXT", pl.String),
+    "ELO Diff": ("INTEGER", pl.Int16),
+    "Icon_Path": ("TEXT", pl.String),
+}
+# one row per game, matching calculate_gamewise_df
+game_columns = {
+    "Row Index": ("INTEGER", pl.UInt32),
+    "Date": ("TEXT", pl.Date),
+    "Time": ("TEXT", pl.String),
+    "My ELO": ("INTEGER", pl.Int16),
+    "Opponent ELO": ("INTEGER", pl.Int16),
+    "Game": ("TEXT", pl.String),
+    "Main": ("TEXT", pl.String),
+    "Stage": ("TEXT", pl.String),
+    "Stock Diff": ("TEXT", pl.String),
+    "Char": ("TEXT", pl.String),
+    "Stage_Choice": ("TEXT", pl.String),
+    "Win": ("INTEGER", pl.Boolean),
+}
+set_indexes = {
+    "sets_player_date": ["Player", "Date"],
+    "sets_player_main": ["Player", "Main"],
+    "sets_player_my_elo": ["Player", "My ELO"],
+    "sets_player_opponent_elo": ["Player", "Opponent ELO"],
+}
+game_indexes = {
+    "games_player_date": ["Player", "Date"],
+    "games_player_stage": ["Player", "Stage"],
+    "games_player_char_stage": ["Player", "Char", "Stage"],
+    "games_player_my_elo": ["Player", "My ELO"],
+    "games_player_opponent_elo": ["Player", "Opponent ELO"],
+}
+
+
+# Everything reads sets and games through load_sets and load_games, so the filters
+# can be pushed down to wherever the data lives. The dashboard loads its own player's
+# whole history once per dataset and filters that in memory. The filtered loads are
+# used by the API and the Compare tab for other players.
+class Storage(ABC):
+    player = None
+
+    @abstractmethod
+    def signature(self):
+        # changes whenever the stored data changes, used to trigger reloads
+        pass
+
+    def players(self) -> list[str]:
+        return [self.player]
+
+    @abstractmethod
+    def load_sets(
+        self,
+        player: str | None = None,
+        start_date=None,
+        end_date=None,
+        character: str | None = None,
+    ) -> pl.DataFrame:
+        pass
+
+    @abstractmethod
+    def load_games(
+        self,
+        player: str | None = None,
+        start_date=None,
+        end_date=None,
+        character: str | None = None,
+        stage: str | None = None,
+        stage_choice: str | None = None,
+        min_elo: int | None = None,
+        max_elo: int | None = None,
+    ) -> pl.DataFrame:
+        pass
+
+
+def _quote(name: str) -> str:
+    # the spreadsheet's column names have spaces and slashes in them
+    return f'"{name}"'
+
+
+def _filter_expressions(
+    date_column,
+    start_date,
+    end_date,
+    equals: dict,
+    min_elo=None,
+    max_elo=None,
+) -> list[pl.Expr]:
+    expressions = []
+    if start_date is not None:
+        expressions.append(pl.col(date_column) >= start_date)
+    if end_date is not None:
+        expressions.append(pl.col(date_column) <= end_date)
+    for column, value in equals.items():
+        if value is not None:
+            expressions.append(pl.col(column) == value)
+    if min_elo is not None:
+        expressions.append(pl.col("Opponent ELO") >= min_elo)
+    if max_elo is not None:
+        expressions.append(pl.col("Opponent ELO") <= max_elo)
+    return expressions
+
+
+def filter_sets(
+    setwise_df: pl.DataFrame, start_date=None, end_date=None, character=None
+) -> pl.DataFrame:
+    # load_sets' filters, for sets that are already in memory
+    expressions = _filter_expressions("Date", start_date, end_date, {"Main": character})
+    return setwise_df.filter(expressions) if expressions else setwise_df
+
+
+def filter_games(
+    gamewise_df: pl.DataFrame,
+    start_date=None,
+    end_date=None,
+    character=None,
+    stage=None,
+    stage_choice=None,
+    min_elo=None,
+    max_elo=None,
+) -> pl.DataFrame:
+    # load_games' filters, for games that are already in memory
+    expressions = _filter_expressions(
+        "Date",
+        start_date,
+        end_date,
+        {"Char": character, "Stage": stage, "Stage_Choice": stage_choice},
+        min_elo,
+        max_elo,
+    )
+    return gamewise_df.filter(expressions) if expressions else gamewise_df
+
+
+# The original flat TSV: parsed once per file change and filtered in memory.
+class SpreadsheetStorage(Storage):
+    def __init__(self, filepath: str, player: str | None = None):
+        self.filepath = filepath
+        self.player = player or Path(filepath).stem
+        self._cache_signature = None
+        self._setwise_df = None
+        self._gamewise_df = None
+        # sets and games can be loaded from different threads, only parse once
+        self._load_lock = threading.Lock()
+
+    def signature(self):
+        stat = os.stat(self.filepath)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        with self._load_lock:
+            signature = self.signature()
+            if signature != self._cache_signature:
+                self._setwise_df = parse_spreadsheet(self.filepath)
+                self._gamewise_df = calculate_gamewise_df(self._setwise_df)
+                # parse_spreadsheet may rewrite the file to scrub private columns
+                self._cache_signature = self.signature()
+            return self._setwise_df, self._gamewise_df
+
+    def _check_player(self, player):
+        if player is not None and player != self.player:
+            raise KeyError(f"Player '{player}' is not in {self.filepath}")
+
+    def load_sets(self, player=None, start_date=None, end_date=None, character=None):
+        self._check_player(player)
+        setwise_df, _ = self._load()
+        return filter_sets(setwise_df, start_date, end_date, character)
+
+    def load_games(
+        self,
+        player=None,
+        start_date=None,
+        end_date=None,
+        character=None,
+        stage=None,
+        stage_choice=None,
+        min_elo=None,
+        max_elo=None,
+    ):
+        self._check_player(player)
+        _, gamewise_df = self._load()
+        return filter_games(
+            gamewise_df,
+            start_date,
+            end_date,
+            character,
+            stage,
+            stage_choice,
+            min_elo,
+            max_elo,
+        )
+
+
+# Local SQLite file holding any number of players' histories, one row per set and
+# one row per game, indexed so filtered loads (the API's, for other players) become
+# index lookups and only the matching rows are ever loaded into polars.
+class SQLiteStorage(Storage):
+    def __init__(self, db_path: str, player: str | None = None):
+        self.db_path = db_path
+        with self._connect() as connection:
+            self._create_tables(connection)
+        players = self.players()
+        if player is None and len(players) == 1:
+            player = players[0]
+        self.player = player
+
+    @contextmanager
+    def _connect(self):
+        # a connection per call keeps this safe to use from the dash request threads
+        connection = sqlite3.connect(self.db_path)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _create_tables(self, connection: sqlite3.Connection):
+        for table, columns, indexes in [
+            ("sets", set_columns, set_indexes),
+            ("games", game_columns, game_indexes),
+        ]:
+            column_sql = ", ".join(
+                ['"Player" TEXT NOT NULL']
+                + [
+                    f"{_quote(name)} {sql_type}"
+                    for name, (sql_type, _) in columns.items()
+                ]
+            )
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_sql})")
+            existing = {
+                row[1] for row in connection.execute(f"PRAGMA table_info({table})")
+            }
+            for name, (sql_type, _) in columns.items():
+                if name not in existing:
+                    # made before the column was stored, empty until the next import
+                    connection.execute(
+                        f"ALTER TABLE {table} ADD COLUMN {_quote(name)} {sql_type}"
+                    )
+            for index, index_columns in indexes.items():
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index} ON {table} "
+                    f"({', '.join(_quote(c) for c in index_columns)})"
+                )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)"
+        )
+        connection.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0)"
+        )
+
+    def signature(self):
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT value FROM meta WHERE key = 'revision'"
+            ).fetchone()[0]
+
+    def players(self) -> list[str]:
+        with self._connect() as connection:
+            return [
+                row[0]
+                for row in connection.execute(
+                    'SELECT DISTINCT "Player" FROM sets ORDER BY "Player"'
+                )
+            ]
+
+    def import_spreadsheet(self, filepath: str, player: str | None = None):
+        # replaces everything stored for the player with the spreadsheet's contents
+        player = player or Path(filepath).stem
+        setwise_df = parse_spreadsheet(filepath)
+        gamewise_df = calculate_gamewise_df(setwise_df)
+        with self._connect() as connection:
+            for table, columns, df in [
+                ("sets", set_columns, setwise_df),
+                ("games", game_columns, gamewise_df),
+            ]:
+                connection.execute(f'DELETE FROM {table} WHERE "Player" = ?', (player,))
+                df = df.select(
+                    [pl.lit(player).alias("Player")]
+                    + [
+                        (
+                            pl.col(name).cast(pl.String)
+                            if polars_type == pl.Date
+                            else pl.col(name)
+                        )
+                        for name, (_, polars_type) in columns.items()
+                    ]
+                )
+                placeholders = ", ".join(["?"] * len(df.columns))
+                names = ", ".join(_quote(name) for name in df.columns)
+                connection.executemany(
+                    f"INSERT INTO {table} ({names}) VALUES ({placeholders})",
+                    df.iter_rows(),
+                )
+            connection.execute(
+                "UPDATE meta SET value = value + 1 WHERE key = 'revision'"
+            )
+        if self.player is None:
+            self.player = player
+        return len(setwise_df)
+
+    def _query(
+        self, table: str, columns: dict, where: dict, order_by: list[str]
+    ) -> pl.DataFrame:
+        clauses, parameters = [], []
+        for (column, operator), value in where.items():
+            if value is not None:
+                clauses.append(f"{_quote(column)} {operator} ?")
+                parameters.append(str(value) if column == "Date" else value)
+        sql = f"SELECT {', '.join(_quote(c) for c in columns)} FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {', '.join(_quote(c) for c in order_by)}"
+        with self._connect() as connection:
+            rows = connection.execute(sql, parameters).fetchall()
+        df = pl.DataFrame(
+            rows,
+            schema={
+                name: pl.String if polars_type == pl.Date else polars_type
+                for name, (_, polars_type) in columns.items()
+            },
+            orient="row",
+        )
+        return df.with_columns(
+            [
+                pl.col(name).str.strptime(pl.Date, format="%Y-%m-%d")
+                for name, (_, polars_type) in columns.items()
+                if polars_type == pl.Date
+            ]
+        )
+
+    def load_sets(self, player=None, start_date=None, end_date=None, character=None):
+        return self._query(
+            "sets",
+            set_columns,
+            {
+                ("Player", "="): player or self.player,
+                ("Date", ">="): start_date,
+                ("Date", "<="): end_date,
+                ("Main", "="): character,
+            },
+            order_by=["Row Index"],
+        )
+
+    def load_games(
+        self,
+        player=None,
+        start_date=None,
+        end_date=None,
+        character=None,
+        stage=None,
+        stage_choice=None,
+        min_elo=None,
+        max_elo=None,
+    ):
+        return self._query(
+            "games",
+            game_columns,
+            {
+                ("Player", "="): player or self.player,
+                ("Date", ">="): start_date,
+                ("Date", "<="): end_date,
+                ("Char", "="): character,
+                ("Stage", "="): stage,
+                ("Stage_Choice", "="): stage_choice,
+                ("Opponent ELO", ">="): min_elo,
+                ("Opponent ELO", "<="): max_elo,
+            },
+            order_by=["Row Index", "Game"],
+        )
+
+
+def open_storage(path: str, player: str | None = None) -> Storage:
+    if Path(path).suffix in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteStorage(path, player)
+    return SpreadsheetStorage(path, player)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Import spreadsheets into a local SQLite database"
+    )
+    parser.add_argument("database", help="path to the .db file, created if missing")
+    parser.add_argument(
+        "spreadsheets", nargs="+", help="one spreadsheet (.tsv) per player"
+    )
+    parser.add_argument(
+        "--player", help="player name, defaults to the spreadsheet's file name"
+    )
+    args = parser.parse_args(argv)
+    if args.player and len(args.spreadsheets) > 1:
+        parser.error("--player can only be used with a single spreadsheet")
+
+    storage = SQLiteStorage(args.database)
+    for spreadsheet in args.spreadsheets:
+        player = args.player or Path(spreadsheet).stem
+        n_sets = storage.import_spreadsheet(spreadsheet, player)
+        print(f"Imported {n_sets} sets for {player} into {args.database}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from compute_pool import ComputePool
+
+
+def run_together(count: int, fn) -> list:
+    results = [None] * count
+
+    def call(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_misses_compute_once():
+    pool = ComputePool(max_workers=2, max_queue=0, admission_timeout=0.1)
+    calls = []
+
+    def slow(x):
+        calls.append(x)
+        time.sleep(0.3)
+        return x * 2
+
+    results = run_together(10, lambda: pool.cached(("key",), slow, 21))
+    assert results == [42] * 10
+    assert len(calls) == 1
+    assert pool.metrics()["coalesced"] == 9
+    assert pool.metrics()["rejected"] == 0
+    # the next call is a plain cache hit
+    assert pool.cached(("key",), slow, 21) == 42
+    assert len(calls) == 1
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    pool = ComputePool(max_workers=2)
+
+    def fail():
+        time.sleep(0.2)
+        raise ValueError("boom")
+
+    results = run_together(5, lambda: pool.cached(("key",), fail))
+    assert all(isinstance(result, ValueError) for result in results)
+    assert pool.cached(("key",), lambda: "ok") == "ok"
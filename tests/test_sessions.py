@@ -0,0 +1,21 @@
+from datetime import date
+
+import polars as pl
+
+from df_utils import calculate_sessions
+
+
+def test_elo_change_is_each_sessions_own():
+    setwise_df = pl.DataFrame(
+        {
+            "Date": [date(2025, 3, 1)] * 2 + [date(2025, 3, 2)] * 2,
+            "Time": ["20:00", "20:15", "21:00", "21:10"],
+            # the second session starts 5 above where the first ended
+            "My ELO": [900, 910, 905, 895],
+            "Ending ELO": [910, 920, 895, 905],
+            "Win/Loss": ["W", "W", "L", "W"],
+        }
+    )
+    summary_df = calculate_sessions(setwise_df)["summary"]
+    assert summary_df["Sets"].to_list() == [2, 2]
+    assert summary_df["ELO Change"].to_list() == [20, 0]
@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+import polars as pl
+
+from df_utils import calculate_stage_regressions
+from game_data import stage_dimensions, stage_metadata
+from graph_utils import make_stage_scatter
+
+
+def scatter_df(winrates: list[float]) -> pl.DataFrame:
+    return stage_metadata.head(len(winrates)).with_columns(
+        pl.Series("WinRate", winrates, dtype=pl.Float64)
+    )
+
+
+def test_single_stage_has_no_slope():
+    stage_scatter_df = scatter_df([60.0])
+    regressions = calculate_stage_regressions(stage_scatter_df)
+    for dimension in stage_dimensions:
+        assert math.isnan(regressions[dimension]["slope"])
+        assert math.isnan(regressions[dimension]["r2"])
+        assert regressions[dimension]["predicted"].tolist() == [60.0]
+    assert regressions["Multivariate"] is None
+    # and the scatter still draws
+    make_stage_scatter(
+        stage_scatter_df, regressions, "", "", "", independent_var="Stage_Width"
+    )
+
+
+def test_equal_winrates_have_no_r2():
+    regressions = calculate_stage_regressions(scatter_df([50.0] * 8))
+    for dimension in stage_dimensions:
+        assert math.isnan(regressions[dimension]["r2"])
+    assert math.isnan(regressions["Multivariate"]["r2"])
+
+
+def test_fit_matches_lstsq():
+    stage_scatter_df = scatter_df([40.0, 55.0, 62.5, 48.0, 70.0, 35.0])
+    regressions = calculate_stage_regressions(stage_scatter_df)
+    y = stage_scatter_df["WinRate"].to_numpy()
+    for dimension in stage_dimensions:
+        x = stage_scatter_df[dimension].to_numpy().astype(float)
+        if x.std() == 0:
+            continue
+        slope, intercept = np.polyfit(x, y, 1)
+        assert math.isclose(regressions[dimension]["slope"], slope, rel_tol=1e-9)
+        assert math.isclose(regressions[dimension]["intercept"], intercept)
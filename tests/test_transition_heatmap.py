@@ -0,0 +1,28 @@
+import polars as pl
+
+from dataset import build_transition_heatmap
+from graph_utils import make_transition_heatmap
+
+
+def transitions_df(rows: list[tuple[str, str, int]]) -> pl.DataFrame:
+    return pl.DataFrame(
+        rows,
+        schema={"G1 Char": pl.String, "G2 Char": pl.String, "Count": pl.UInt32},
+        orient="row",
+    )
+
+
+def test_no_game_2_gives_an_empty_heatmap():
+    fig = make_transition_heatmap(transitions_df([]), "Switches")
+    assert len(fig.data) == 0
+    assert fig.layout.annotations[0].text == "No sets reached game 2"
+    fig = build_transition_heatmap({"transitions": transitions_df([])})
+    assert len(fig.data) == 0
+
+
+def test_heatmap_counts():
+    fig = make_transition_heatmap(
+        transitions_df([("Kragg", "Kragg", 3), ("Kragg", "Ranno", 1)]), "Switches"
+    )
+    assert list(fig.data[0].y) == ["Kragg"]
+    assert fig.data[0].z.tolist() == [[3, 1]]
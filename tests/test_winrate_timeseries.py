@@ -0,0 +1,33 @@
+from datetime import date
+
+import polars as pl
+
+from df_utils import calculate_winrate_timeseries
+
+
+def test_weekly_and_monthly_buckets():
+    gamewise_df = pl.DataFrame(
+        {
+            # a Monday, the Sunday before it and the first of the next month
+            "Date": [date(2025, 1, 6), date(2025, 1, 5), date(2025, 2, 1)],
+            "Char": ["Kragg", "Kragg", "Kragg"],
+            "Stage": ["Aethereal Gates", "Aethereal Gates", "Fire Capital"],
+            "Win": [True, False, True],
+        }
+    )
+    timeseries_df = calculate_winrate_timeseries(gamewise_df)
+    assert timeseries_df.schema["WinRate"] == pl.Float32
+
+    kragg = timeseries_df.filter(pl.col("Value") == "Kragg")
+    weekly = kragg.filter(pl.col("Window") == "Weekly")
+    assert weekly["Date"].to_list() == [
+        date(2024, 12, 30),
+        date(2025, 1, 6),
+        date(2025, 1, 27),
+    ]
+    assert weekly["WinRate"].to_list() == [0, 100, 100]
+    monthly = kragg.filter(pl.col("Window") == "Monthly")
+    assert monthly["Date"].to_list() == [date(2025, 1, 1), date(2025, 2, 1)]
+    assert monthly["Wins"].to_list() == [1, 1]
+    assert monthly["Total_Matches"].to_list() == [2, 1]
+    assert monthly["WinRate"].to_list() == [50, 100]